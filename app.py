@@ -1,28 +1,119 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, make_response
-from openai_service import generate_educational_content
+from logging_config import configure_logging, request_id_var
+
+# Send logs through the background queue writer (LOG_LEVEL, LOG_LEVELS,
+# LOG_FORMAT) before the service modules start logging at import
+configure_logging()
+
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, Response, make_response, stream_with_context, g
+from openai_service import (get_educational_content, stream_educational_content, generate_batch, regenerate_section,
+                            course_hedger, section_hedger, BATCH_CONCURRENCY)
+from course_schema import REQUIRED_SECTIONS
+from content_cache import content_cache
+from single_flight import generation_flight, stream_flight
+from circuit_breaker import upstream_breaker
+from database import db
+from llm_backends import warm_up as warm_up_llm_backend
+from exporters import EXPORT_FORMATS, negotiate_format
+from title_index import title_index, TITLE_MATCH_MODE
+import http_cache
+from http_cache import content_etag, is_not_modified, not_modified, set_validators
+from metrics import registry, CallbackMetric, HTTP_REQUESTS, HTTP_REQUEST_SECONDS, time_stage
+import click
 import json
+import time
+import uuid
 from datetime import datetime
 
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 # Create the Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "fallback-secret-key")
 
+# Configure the database used for generation jobs
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///edugen.db")
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_recycle": 300,
+    "pool_pre_ping": True,
+}
+db.init_app(app)
+
+with app.app_context():
+    import models  # noqa: F401
+    db.create_all()
+
+from jobs import job_runner, submit_job, get_job, cancel_job, TERMINAL_STATUSES
+job_runner.init_app(app)
+
+from course_library import course_library, list_courses, search_courses, get_course, InvalidCursorError
+course_library.init_app(app)
+
+# Optionally load the LLM SDK and client in the background (LLM_WARMUP)
+warm_up_llm_backend()
+
+# Compression, fingerprinted static URLs and cache headers
+http_cache.init_app(app)
+PAGE_VERSION = http_cache.page_version(app.template_folder, app.static_folder)
+
+# Limits for the batch generation API
+BATCH_MAX_TITLES = int(os.environ.get("BATCH_MAX_TITLES", "500"))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", "32"))
+
+# Expose cache and circuit breaker state alongside the request metrics
+registry.register(CallbackMetric(
+    "edugen_cache_hits_total", "Content cache hits across both tiers",
+    lambda: sum(content_cache.stats()['hits'].values()), type_name="counter"))
+registry.register(CallbackMetric(
+    "edugen_cache_misses_total", "Content cache misses",
+    lambda: content_cache.stats()['misses'], type_name="counter"))
+registry.register(CallbackMetric(
+    "edugen_upstream_circuit_open", "1 while the Gemini circuit breaker is not closed",
+    lambda: int(upstream_breaker.state != 'closed')))
+
+@app.before_request
+def start_request():
+    g.request_start = time.perf_counter()
+    # Honour a request ID set by the proxy so logs can be joined across services
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    request_id_var.set(g.request_id)
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    if 'request_start' in g:
+        HTTP_REQUEST_SECONDS.observe(endpoint, value=time.perf_counter() - g.request_start)
+    HTTP_REQUESTS.inc(endpoint, request.method, response.status_code)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def clear_request_id(exc):
+    request_id_var.set(None)
+
+def course_title_error(course_title):
+    """Return an API error message for an invalid course title, or None"""
+    if not course_title:
+        return 'Course title is required'
+    if len(course_title) < 3:
+        return 'Course title must be at least 3 characters long'
+    if len(course_title) > 200:
+        return 'Course title must be less than 200 characters'
+    return None
+
 @app.route('/')
 def index():
     """Main page with course title input form"""
     return render_template('index.html')
 
-@app.route('/generate', methods=['POST'])
+@app.route('/generate', methods=['GET', 'POST'])
 def generate_content():
     """Generate educational content based on course title"""
     try:
-        # Get course title from form
-        course_title = request.form.get('course_title', '').strip()
+        # Get course title from the form, or the query string for shareable GET links
+        course_title = request.values.get('course_title', '').strip()
         
         # Validate input
         if not course_title:
@@ -37,105 +128,347 @@ def generate_content():
             flash('Course title must be less than 200 characters.', 'error')
             return redirect(url_for('index'))
         
-        # Generate content using OpenAI
-        logging.debug(f"Generating content for course: {course_title}")
-        content = generate_educational_content(course_title)
+        # Generate content using Gemini, reusing cached results for repeat titles
+        logger.debug("Generating content for course: %s", course_title)
+        content = get_educational_content(course_title)
         
         # Log successful content generation
-        logging.info(f"Successfully generated educational content for: {course_title}")
+        logger.info("Successfully generated educational content for: %s", course_title)
+        
+        # Repeat views of the same content skip rendering entirely
+        etag = content_etag('page', course_title, content, PAGE_VERSION)
+        if is_not_modified(etag):
+            return not_modified(etag)
         
         # Render results page with generated content
-        return render_template('index.html', 
-                             course_title=course_title, 
-                             content=content,
-                             show_results=True)
+        with time_stage('render_template'):
+            response = make_response(render_template('index.html', 
+                                                     course_title=course_title, 
+                                                     content=content,
+                                                     show_results=True))
+        if request.method == 'GET':
+            set_validators(response, etag)
+        return response
         
     except Exception as e:
-        logging.error(f"Error generating content: {str(e)}")
+        logger.error("Error generating content: %s", e)
         flash(f'An error occurred while generating content: {str(e)}', 'error')
         return redirect(url_for('index'))
 
-@app.route('/api/generate', methods=['POST'])
+@app.route('/api/generate', methods=['GET', 'POST'])
 def api_generate_content():
     """API endpoint for generating content (for AJAX requests)"""
     try:
-        data = request.get_json()
+        # GET requests can be revalidated with If-None-Match
+        data = request.args if request.method == 'GET' else request.get_json()
         course_title = data.get('course_title', '').strip()
         
         # Validate input
-        if not course_title:
-            return jsonify({'error': 'Course title is required'}), 400
-        
-        if len(course_title) < 3:
-            return jsonify({'error': 'Course title must be at least 3 characters long'}), 400
-        
-        if len(course_title) > 200:
-            return jsonify({'error': 'Course title must be less than 200 characters'}), 400
+        error = course_title_error(course_title)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Generate content
-        content = generate_educational_content(course_title)
+        content = get_educational_content(course_title)
         
-        return jsonify({
+        etag = content_etag('api', course_title, content)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        return set_validators(jsonify({
             'success': True,
             'course_title': course_title,
             'content': content
-        })
+        }), etag)
         
     except Exception as e:
-        logging.error(f"API error generating content: {str(e)}")
+        logger.error("API error generating content: %s", e)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/generate/section', methods=['POST'])
+def api_regenerate_section():
+    """Regenerate one section of an already generated course"""
+    data = request.get_json(silent=True) or {}
+    course_title = str(data.get('course_title', '')).strip()
+    section = data.get('section')
+
+    error = course_title_error(course_title)
+    if error:
+        return jsonify({'error': error}), 400
+    if section not in REQUIRED_SECTIONS:
+        return jsonify({'error': f"section must be one of: {', '.join(REQUIRED_SECTIONS)}"}), 400
+
+    if content_cache.get(course_title, count_miss=False) is None:
+        return jsonify({'error': 'Course has not been generated yet'}), 404
+
+    content = regenerate_section(course_title, section)
+    if content is None:
+        return jsonify({'error': f'Could not regenerate {section}'}), 502
+
+    return jsonify({
+        'success': True,
+        'course_title': course_title,
+        'section': section,
+        'content': content
+    })
+
+@app.route('/api/generate/batch', methods=['POST'])
+def api_generate_batch():
+    """Generate content for many course titles, streaming one JSON line per title as each finishes"""
+    data = request.get_json(silent=True) or {}
+    course_titles = data.get('course_titles')
+    
+    # Validate input
+    if not isinstance(course_titles, list) or not course_titles:
+        return jsonify({'error': 'course_titles must be a non-empty list'}), 400
+    
+    if len(course_titles) > BATCH_MAX_TITLES:
+        return jsonify({'error': f'A batch may contain at most {BATCH_MAX_TITLES} course titles'}), 400
+    
+    try:
+        concurrency = int(data.get('concurrency', BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency must be an integer'}), 400
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    
+    valid_titles = []
+    invalid_results = []
+    for course_title in course_titles:
+        course_title = course_title.strip() if isinstance(course_title, str) else ''
+        error = course_title_error(course_title)
+        if error:
+            invalid_results.append({'course_title': course_title, 'success': False, 'error': error})
+        else:
+            valid_titles.append(course_title)
+    
+    def results():
+        for result in invalid_results:
+            yield json.dumps(result) + "\n"
+        for result in generate_batch(valid_titles, concurrency=concurrency):
+            yield json.dumps(result) + "\n"
+    
+    return Response(stream_with_context(results()), mimetype='application/x-ndjson')
+
+@app.route('/api/generate/stream')
+def api_generate_stream():
+    """Server-Sent Events endpoint that sends each section as soon as it is generated"""
+    course_title = request.args.get('course_title', '').strip()
+    
+    error = course_title_error(course_title)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def events():
+        try:
+            for event, data in stream_educational_content(course_title):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.error("Streaming error generating content: %s", e)
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queue a generation job and return its ID immediately"""
+    data = request.get_json(silent=True) or {}
+    course_title = str(data.get('course_title', '')).strip()
+    
+    error = course_title_error(course_title)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    job = submit_job(course_title)
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('api_job_status', job_id=job.id)
+    return response
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Poll the status of a generation job, including its content once finished"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    response = jsonify(job.to_dict())
+    if job.status not in TERMINAL_STATUSES:
+        # Polling interval hint for clients waiting on the job
+        response.headers['Retry-After'] = '1'
+    return response
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def api_cancel_job(job_id):
+    """Cancel a queued or running generation job"""
+    job = cancel_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/download/<course_title>')
 def download_content(course_title):
-    """Download generated content as a text file"""
+    """Download generated content as txt, md, json, csv or html (?format= or Accept header)"""
     try:
-        # Generate content for download
-        content = generate_educational_content(course_title)
-        
-        # Format content as text
-        text_content = f"Educational Content for: {course_title}\n"
-        text_content += "=" * 50 + "\n\n"
-        
-        if 'course_objectives' in content:
-            text_content += "COURSE OBJECTIVES:\n"
-            for i, obj in enumerate(content['course_objectives'], 1):
-                text_content += f"{i}. {obj['objective']} ({obj['bloom_level']})\n"
-            text_content += "\n"
-        
-        text_content += "LEARNING OUTCOMES:\n"
-        for i, outcome in enumerate(content['learning_outcomes'], 1):
-            text_content += f"{i}. {outcome['outcome']} ({outcome['bloom_level']})\n"
-        text_content += "\n"
-        
-        text_content += "SAMPLE SYLLABUS:\n"
-        for week in content['syllabus']:
-            text_content += f"• {week['week']}: {week['topic']}\n"
-            text_content += f"  - {week['description']}\n"
-        text_content += "\n"
-        
-        text_content += "ASSESSMENT METHODS:\n"
-        for assessment in content['assessment_methods']:
-            text_content += f"• {assessment['method']} ({assessment['weight']})\n"
-            text_content += f"  - {assessment['description']}\n"
-        text_content += "\n"
-        
-        text_content += "RECOMMENDED READINGS:\n"
-        for reading in content['recommended_readings']:
-            text_content += f"• {reading['title']} by {reading['author']}\n"
-            text_content += f"  - Type: {reading['type']}\n"
-            text_content += f"  - {reading['description']}\n"
-        
-        # Create response with download headers
-        response = make_response(text_content)
-        response.headers['Content-Type'] = 'text/plain'
-        response.headers['Content-Disposition'] = f'attachment; filename="{course_title.replace(" ", "_")}_content.txt"'
+        export_format = negotiate_format(request.args.get('format'), request.accept_mimetypes)
+        if export_format is None:
+            flash(f'Unsupported download format: {request.args.get("format")}', 'error')
+            return redirect(url_for('index'))
+        mimetype, extension, exporter = EXPORT_FORMATS[export_format]
         
-        return response
+        # Reuse the content the user just saw instead of regenerating it
+        content = get_educational_content(course_title)
+        
+        etag = content_etag('download', course_title, content, export_format)
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        # Stream the export with download headers
+        response = Response(stream_with_context(exporter([(course_title, content)])), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{course_title.replace(" ", "_")}_content.{extension}"'
+        
+        return set_validators(response, etag)
         
     except Exception as e:
-        logging.error(f"Error generating download: {str(e)}")
+        logger.error("Error generating download: %s", e)
         flash(f'Error generating download: {str(e)}', 'danger')
         return redirect(url_for('index'))
 
+@app.route('/api/export', methods=['POST'])
+def api_export():
+    """Stream an export of many already-generated courses without calling the model"""
+    data = request.get_json(silent=True) or {}
+    course_titles = data.get('course_titles')
+    
+    if not isinstance(course_titles, list) or not course_titles:
+        return jsonify({'error': 'course_titles must be a non-empty list'}), 400
+    
+    export_format = negotiate_format(data.get('format'), request.accept_mimetypes, default='json')
+    if export_format is None:
+        return jsonify({'error': f'Unsupported export format: {data.get("format")}'}), 400
+    mimetype, extension, exporter = EXPORT_FORMATS[export_format]
+    
+    def cached_courses():
+        # Look courses up one at a time so memory stays flat for large exports
+        for course_title in course_titles:
+            if not isinstance(course_title, str):
+                continue
+            content = content_cache.get(course_title.strip())
+            if content is not None:
+                yield course_title.strip(), content
+    
+    response = Response(stream_with_context(exporter(cached_courses())), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="courses_export.{extension}"'
+    return response
+
+@app.route('/api/courses/similar')
+def similar_courses():
+    """Already generated courses whose titles are near duplicates of course_title"""
+    course_title = request.args.get('course_title', '').strip()
+    error = course_title_error(course_title)
+    if error:
+        return jsonify({'error': error}), 400
+    if TITLE_MATCH_MODE == 'off':
+        return jsonify({'course_title': course_title, 'matches': []})
+
+    try:
+        threshold = float(request.args['threshold']) if 'threshold' in request.args else None
+        limit = min(int(request.args.get('limit', 5)), 20)
+    except ValueError:
+        return jsonify({'error': 'threshold and limit must be numbers'}), 400
+
+    matches = title_index.matches(course_title, threshold=threshold, limit=limit)
+    return jsonify({
+        'course_title': course_title,
+        'matches': [match._asdict() for match in matches],
+    })
+
+@app.route('/api/courses')
+def library_courses():
+    """Generated courses, newest first, one keyset page at a time"""
+    try:
+        courses, next_cursor = list_courses(limit=request.args.get('limit', 20),
+                                            cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e) if isinstance(e, InvalidCursorError) else 'limit must be a number'}), 400
+    return jsonify({'courses': [course.to_summary() for course in courses], 'next_cursor': next_cursor})
+
+@app.route('/api/courses/search')
+def library_search():
+    """Full-text search over course titles, objectives, syllabus topics and readings"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        courses, next_cursor = search_courses(query, limit=request.args.get('limit', 20),
+                                              cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e) if isinstance(e, InvalidCursorError) else 'limit must be a number'}), 400
+    return jsonify({'q': query, 'courses': [course.to_summary() for course in courses], 'next_cursor': next_cursor})
+
+@app.route('/api/courses/<int:course_id>')
+def library_course(course_id):
+    """A library course with its objectives, syllabus and readings"""
+    course = get_course(course_id)
+    if course is None:
+        return jsonify({'error': 'Course not found'}), 404
+    return jsonify(course.to_dict())
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Content cache hit/miss/eviction counters for monitoring"""
+    stats = content_cache.stats()
+    stats['single_flight'] = generation_flight.stats()
+    stats['stream_flight'] = stream_flight.stats()
+    stats['title_index_entries'] = len(title_index)
+    stats['course_library'] = course_library.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage latency, token usage and fallback metrics in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/status/upstream')
+def upstream_status():
+    """Circuit breaker state, rolling latency/error statistics and hedging state for the Gemini upstream"""
+    status = upstream_breaker.snapshot()
+    status['hedging'] = {'course': course_hedger.snapshot(), 'section': section_hedger.snapshot()}
+    return jsonify(status)
+
+@app.cli.command('prewarm')
+@click.argument('titles_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--concurrency', default=4, show_default=True, help='Generations in flight at once.')
+@click.option('--rate', default=1.0, show_default=True, help='Generations started per second (0 for no limit).')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Checkpoint file for resuming. Defaults to TITLES_FILE.checkpoint.')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint.')
+@click.option('--max-failures', default=20, show_default=True,
+              help='Stop after this many consecutive failures (0 to never stop).')
+def prewarm_command(titles_file, concurrency, rate, checkpoint, restart, max_failures):
+    """Generate and cache content for every course title in TITLES_FILE."""
+    from prewarm import Prewarmer, read_titles
+
+    titles = []
+    for title in read_titles(titles_file):
+        error = course_title_error(title)
+        if error:
+            click.echo(f"Skipping '{title}': {error}", err=True)
+        else:
+            titles.append(title)
+    checkpoint = checkpoint or f"{titles_file}.checkpoint"
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    click.echo(f"Pre-warming {len(titles)} titles with concurrency {concurrency}")
+    prewarmer = Prewarmer(concurrency=concurrency, rate=rate, checkpoint_path=checkpoint,
+                          max_failures=max_failures, report=click.echo)
+    counts = prewarmer.run(titles)
+    click.echo(f"Generated {counts['generated']}, already cached {counts['cached'] + counts['checkpointed']}, "
+               f"failed {counts['failed']}")
+    if counts['failed'] or counts['aborted']:
+        raise SystemExit(1)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,98 @@
+"""
+ASGI entry point for serving the app from an event loop.
+
+Run with:  gunicorn -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:5000 asgi:app
+
+POST /api/generate is handled natively with the Gemini async client, so a
+single process can hold hundreds of generations in flight. Every other
+route is served by the Flask app on a bounded thread pool.
+"""
+import json
+import logging
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import app as flask_app, course_title_error
+from openai_service import get_educational_content_async
+
+logger = logging.getLogger(__name__)
+
+# Threads available to the Flask routes that still run synchronously
+WSGI_THREADS = int(os.environ.get("ASGI_WSGI_THREADS", "10"))
+
+wsgi_app = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def api_generate_content(scope, receive, send):
+    """Async version of the /api/generate endpoint"""
+    try:
+        data = json.loads(await read_body(receive) or b"{}")
+        course_title = data.get('course_title', '').strip()
+
+        # Validate input
+        error = course_title_error(course_title)
+        if error:
+            return await send_json(send, {'error': error}, 400)
+
+        # Generate content without holding a thread while Gemini responds
+        content = await get_educational_content_async(course_title)
+
+        return await send_json(send, {
+            'success': True,
+            'course_title': course_title,
+            'content': content
+        })
+
+    except Exception as e:
+        logger.error("API error generating content: %s", e)
+        return await send_json(send, {'error': str(e)}, 500)
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+ASYNC_ROUTES = {
+    ("POST", "/api/generate"): api_generate_content,
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(scope, receive, send)
+
+    if scope["type"] == "http":
+        handler = ASYNC_ROUTES.get((scope["method"], scope["path"]))
+        if handler is not None:
+            return await handler(scope, receive, send)
+
+    return await wsgi_app(scope, receive, send)
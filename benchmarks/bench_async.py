@@ -0,0 +1,101 @@
+"""
+Compare request throughput of the sync WSGI path against the ASGI entry
+point, using the stub LLM backend with a fixed upstream latency.
+
+    python benchmarks/bench_async.py --requests 200 --latency 0.5 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+# Keep the benchmark off the shared cache and lock files
+os.environ["CONTENT_CACHE_PATH"] = ""
+os.environ["SINGLE_FLIGHT_LOCK_DIR"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openai_service  # noqa: E402
+from llm_backends import StubBackend  # noqa: E402
+
+
+def bench_sync(requests, workers):
+    """Model gunicorn sync workers: each one serves a single request at a time"""
+    from app import app
+
+    titles = queue.Queue()
+    for i in range(requests):
+        titles.put(f"Sync Benchmark Course {i}")
+
+    def worker():
+        client = app.test_client()
+        while True:
+            try:
+                title = titles.get_nowait()
+            except queue.Empty:
+                return
+            response = client.post("/api/generate", json={"course_title": title})
+            assert response.status_code == 200, response.status_code
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_async(requests, concurrency):
+    """Drive the ASGI app directly with up to `concurrency` requests in flight"""
+    import asgi
+
+    async def call(title, limit):
+        body = json.dumps({"course_title": title}).encode("utf-8")
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        async with limit:
+            await asgi.app({"type": "http", "method": "POST", "path": "/api/generate",
+                            "headers": [(b"content-type", b"application/json")]},
+                           receive, send)
+        assert sent[0]["status"] == 200, sent[0]["status"]
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(call(f"Async Benchmark Course {i}", limit) for i in range(requests)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="stubbed upstream latency in seconds")
+    parser.add_argument("--workers", type=int, default=4, help="sync workers to simulate")
+    parser.add_argument("--concurrency", type=int, default=500, help="max in-flight requests for the ASGI app")
+    args = parser.parse_args()
+
+    openai_service.llm_backend = StubBackend(latency=f"fixed:{args.latency}")
+
+    sync_time = bench_sync(args.requests, args.workers)
+    async_time = bench_async(args.requests, args.concurrency)
+
+    print(f"{'mode':<8}{'requests':>10}{'seconds':>10}{'req/s':>10}")
+    print(f"{'sync':<8}{args.requests:>10}{sync_time:>10.2f}{args.requests / sync_time:>10.1f}")
+    print(f"{'async':<8}{args.requests:>10}{async_time:>10.2f}{args.requests / async_time:>10.1f}")
+    print(f"speedup: {sync_time / async_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure cold-start time of main:app: process start to import finished, and
+import finished to the first response. Each run is a fresh interpreter so
+nothing is shared between runs.
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --warmup import --delay 1
+    python benchmarks/bench_startup.py --importtime
+
+The app runs against the stub LLM backend by default so no API quota is
+spent; pass --backend gemini with GEMINI_API_KEY set to include the real
+SDK client setup. --delay waits between import and the first request,
+which models a warm-up hook getting a head start before traffic arrives.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from main import app
+imported = time.perf_counter()
+time.sleep({delay})
+client = app.test_client()
+ready = time.perf_counter()
+if {endpoint!r} == "index":
+    response = client.get("/")
+else:
+    response = client.post("/api/generate", json={{"course_title": "Startup Benchmark Course"}})
+response.get_data()
+done = time.perf_counter()
+print(json.dumps({{"import": imported - start, "first_response": done - ready, "status": response.status_code}}))
+"""
+
+
+def run_once(endpoint, env, delay):
+    code = CHILD.format(root=ROOT, endpoint=endpoint, delay=delay)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=ROOT)
+    total = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "child failed")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["total"] = total - delay
+    return timings
+
+
+def top_imports(env, count):
+    """Slowest modules by cumulative import time, from python -X importtime"""
+    code = f"import sys; sys.path.insert(0, {ROOT!r}); import main"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, capture_output=True, text=True, cwd=ROOT)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--endpoints", nargs="+", choices=("index", "api_generate"), default=["index", "api_generate"])
+    parser.add_argument("--backend", default="stub", choices=("stub", "gemini"))
+    parser.add_argument("--warmup", default="off", choices=("off", "import", "connect"), help="LLM_WARMUP mode")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds between import and the first request")
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            LLM_BACKEND=args.backend,
+            LLM_WARMUP=args.warmup,
+            STUB_LATENCY="fixed:0",
+            JOB_WORKERS="0",
+            CONTENT_CACHE_PATH="",
+            SINGLE_FLIGHT_LOCK_DIR="",
+            DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'bench.db')}",
+            LOG_LEVEL="WARNING",
+        )
+
+        print(f"{'endpoint':<14}{'import ms':>11}{'first resp ms':>15}{'total ms':>10}   (median of {args.runs})")
+        for endpoint in args.endpoints:
+            runs = [run_once(endpoint, env, args.delay) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) for key in ("import", "first_response", "total")}
+            print(f"{endpoint:<14}{median['import'] * 1000:>11.0f}{median['first_response'] * 1000:>15.0f}"
+                  f"{median['total'] * 1000:>10.0f}")
+
+        if args.importtime:
+            print("\nslowest imports (cumulative ms):")
+            for cumulative, name in top_imports(env, 15):
+                print(f"{cumulative / 1000:>10.0f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+HTTP load test for a running server. Start the app against the stub LLM
+backend so no API quota is spent, then drive it at several concurrency
+levels:
+
+    LLM_BACKEND=stub STUB_LATENCY=lognormal:1.5:0.4 \
+        gunicorn --bind 0.0.0.0:5000 --workers 4 main:app
+    python benchmarks/load_test.py --url http://localhost:5000 --concurrency 1 8 32
+
+Reports p50/p95/p99 latency and throughput per endpoint and concurrency
+level. With --max-p95 the exit status is non-zero when any scenario is
+slower than the limit, so it can gate a deploy.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from metrics import percentile  # noqa: E402
+
+ENDPOINTS = ("index", "generate", "api_generate", "download")
+
+
+def build_request(base_url, endpoint, course_title):
+    if endpoint == "index":
+        return urllib.request.Request(f"{base_url}/")
+    if endpoint == "generate":
+        body = urllib.parse.urlencode({"course_title": course_title}).encode("utf-8")
+        return urllib.request.Request(f"{base_url}/generate", data=body, method="POST")
+    if endpoint == "api_generate":
+        body = json.dumps({"course_title": course_title}).encode("utf-8")
+        return urllib.request.Request(f"{base_url}/api/generate", data=body, method="POST",
+                                      headers={"Content-Type": "application/json"})
+    if endpoint == "download":
+        return urllib.request.Request(f"{base_url}/download/{urllib.parse.quote(course_title)}")
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+def run_scenario(base_url, endpoint, concurrency, requests, titles, timeout):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            request = build_request(base_url, endpoint, titles[i % len(titles)])
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    ok = response.status < 400
+            except (urllib.error.URLError, OSError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / duration if duration else 0.0,
+        "p50": percentile(latencies, 50) or 0.0,
+        "p95": percentile(latencies, 95) or 0.0,
+        "p99": percentile(latencies, 99) or 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--titles", type=int, default=50,
+                        help="distinct course titles to cycle through (repeats exercise the cache)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-p95", type=float, help="fail when any scenario's p95 exceeds this many seconds")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    titles = [f"Load Test Course {i}" for i in range(args.titles)]
+
+    results = []
+    print(f"{'endpoint':<14}{'conc':>6}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for concurrency in args.concurrency:
+        for endpoint in args.endpoints:
+            result = run_scenario(base_url, endpoint, concurrency, args.requests, titles, args.timeout)
+            results.append(result)
+            print(f"{endpoint:<14}{concurrency:>6}{result['requests']:>7}{result['errors']:>6}"
+                  f"{result['throughput']:>9.1f}{result['p50'] * 1000:>9.0f}"
+                  f"{result['p95'] * 1000:>9.0f}{result['p99'] * 1000:>9.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_p95 is not None:
+        slow = [r for r in results if r["p95"] > args.max_p95]
+        for r in slow:
+            print(f"p95 regression: {r['endpoint']} at concurrency {r['concurrency']} "
+                  f"took {r['p95'] * 1000:.0f} ms", file=sys.stderr)
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
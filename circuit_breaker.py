@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# Configure the upstream circuit breaker from the environment
+BREAKER_TIMEOUT_SECONDS = float(os.environ.get("BREAKER_TIMEOUT", "30"))
+BREAKER_WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW", "60"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_RATE = float(os.environ.get("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_LATENCY_P95_SECONDS = float(os.environ.get("BREAKER_LATENCY_P95", "20"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "30"))
+# Calls run on the breaker's pool so they can time out. Size it for every
+# upstream call the process can have in flight: a batch at its concurrency
+# cap plus the job runners, each generating all five sections at once in
+# sections mode, plus request threads. Calls beyond it are rejected rather
+# than queued. The hedge pool (hedging.py) is sized from this, so hedging
+# adds no queueing of its own.
+BREAKER_MAX_WORKERS = int(os.environ.get("BREAKER_MAX_WORKERS", str(
+    (int(os.environ.get("BATCH_MAX_CONCURRENCY", "32")) + int(os.environ.get("JOB_WORKERS", "2"))) * 5 + 32
+)))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit is open"""
+
+
+class BreakerSaturatedError(CircuitOpenError):
+    """Raised instead of queueing a call when every breaker pool thread is busy"""
+
+
+class CallTimeoutError(Exception):
+    """Raised when an upstream call exceeds the per-call timeout"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker that opens when the rolling error rate or p95 latency
+    of recent upstream calls crosses a threshold. While open, calls fail
+    immediately with CircuitOpenError; after a cool-down a single probe
+    call is let through (half-open) to test for recovery.
+    """
+
+    def __init__(self, name, timeout=BREAKER_TIMEOUT_SECONDS, window=BREAKER_WINDOW_SECONDS,
+                 min_calls=BREAKER_MIN_CALLS, error_rate=BREAKER_ERROR_RATE,
+                 latency_p95=BREAKER_LATENCY_P95_SECONDS, open_seconds=BREAKER_OPEN_SECONDS,
+                 max_workers=BREAKER_MAX_WORKERS):
+        self.name = name
+        self.timeout = timeout
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate
+        self.latency_p95_threshold = latency_p95
+        self.open_seconds = open_seconds
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._executor = None
+        self._in_flight = 0
+        self.rejected = 0
+        self.saturated = 0
+        self.timeouts = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit '%s' half-open, probing upstream", self.name)
+        return self._state
+
+    def allow_request(self):
+        """
+        Reserve permission for one upstream call. Callers that get True
+        must report the outcome with record_success or record_failure.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                logger.info("Circuit '%s' closed, upstream recovered", self.name)
+                self._state = CLOSED
+                self._calls.clear()
+            self._record(True, latency)
+
+    def record_failure(self, latency):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            self._record(False, latency)
+
+    def _record(self, ok, latency):
+        now = time.monotonic()
+        self._calls.append((now, ok, latency))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+        if self._state != CLOSED or len(self._calls) < self.min_calls:
+            return
+        error_rate, p95 = self._window_stats()
+        if error_rate >= self.error_rate_threshold or p95 >= self.latency_p95_threshold:
+            logger.warning(
+                "Circuit '%s' opened: error rate %.0f%%, p95 latency %.1fs", self.name, error_rate * 100, p95
+            )
+            self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+
+    def _window_stats(self):
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        latencies = sorted(latency for _, _, latency in self._calls)
+        return failures / len(self._calls), percentile(latencies, 95)
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn through the breaker with the per-call timeout, measured from
+        when the call starts running. A call that times out keeps running
+        on the breaker's pool but its result is discarded; while it runs it
+        still holds a pool thread.
+        """
+        if not self.timeout:
+            return self._call_inline(fn, *args, **kwargs)
+
+        with self._lock:
+            if self._in_flight >= self.max_workers:
+                self.saturated += 1
+                raise BreakerSaturatedError(f"Circuit '{self.name}' has {self._in_flight} calls in flight")
+            self._in_flight += 1
+        if not self.allow_request():
+            with self._lock:
+                self._in_flight -= 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        started = threading.Event()
+        started_at = []
+
+        def run():
+            started_at.append(time.monotonic())
+            started.set()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        future = self._get_executor().submit(run)
+        # A free thread was reserved above, so this wait is short and is
+        # not counted as upstream latency
+        started.wait()
+        start = started_at[0]
+        try:
+            try:
+                result = future.result(timeout=max(0.0, start + self.timeout - time.monotonic()))
+            except FutureTimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise CallTimeoutError(f"Upstream call exceeded {self.timeout:.0f}s")
+        except Exception:
+            self.record_failure(time.monotonic() - start)
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def _call_inline(self, fn, *args, **kwargs):
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure(time.monotonic() - start)
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """Await the coroutine function fn through the breaker"""
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        start = time.monotonic()
+        try:
+            try:
+                result = await asyncio.wait_for(fn(*args, **kwargs), timeout=self.timeout or None)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    self.timeouts += 1
+                raise CallTimeoutError(f"Upstream call exceeded {self.timeout:.0f}s")
+        except Exception:
+            self.record_failure(time.monotonic() - start)
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"breaker-{self.name}"
+                    )
+        return self._executor
+
+    def snapshot(self):
+        """Breaker state and rolling window statistics for monitoring"""
+        with self._lock:
+            state = self._current_state()
+            latencies = sorted(latency for _, _, latency in self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            return {
+                'name': self.name,
+                'state': state,
+                'window_calls': len(self._calls),
+                'window_failures': failures,
+                'error_rate': failures / len(self._calls) if self._calls else 0.0,
+                'latency_p50': percentile(latencies, 50),
+                'latency_p95': percentile(latencies, 95),
+                'latency_p99': percentile(latencies, 99),
+                'rejected': self.rejected,
+                'in_flight': self._in_flight,
+                'saturated': self.saturated,
+                'timeouts': self.timeouts,
+                'times_opened': self.times_opened,
+                'thresholds': {
+                    'timeout': self.timeout,
+                    'error_rate': self.error_rate_threshold,
+                    'latency_p95': self.latency_p95_threshold,
+                    'min_calls': self.min_calls,
+                    'open_seconds': self.open_seconds,
+                    'max_workers': self.max_workers,
+                },
+            }
+
+
+upstream_breaker = CircuitBreaker('gemini')
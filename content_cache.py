@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Configure cache limits from the environment
+CACHE_MAX_ENTRIES = int(os.environ.get("CONTENT_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.environ.get("CONTENT_CACHE_TTL", "3600"))
+CACHE_DB_PATH = os.environ.get("CONTENT_CACHE_PATH", os.path.join("instance", "content_cache.sqlite3"))
+CACHE_DB_TTL_SECONDS = float(os.environ.get("CONTENT_CACHE_DB_TTL", str(7 * 24 * 3600)))
+
+
+def normalize_title(course_title):
+    """
+    Normalize a course title into a cache key so that differences in
+    case and whitespace map to the same generated content
+    """
+    return re.sub(r"\s+", " ", course_title or "").strip().casefold()
+
+
+class MemoryCache:
+    """
+    In-process LRU tier with a size limit and a per-entry TTL
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, content = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def set(self, key, content):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Persistent tier stored in a local SQLite file so that every gunicorn
+    worker on the same machine shares generated content
+    """
+
+    def __init__(self, path=CACHE_DB_PATH, ttl=CACHE_DB_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS content_cache ("
+                " cache_key TEXT PRIMARY KEY,"
+                " course_title TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT content, created_at FROM content_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        content, created_at = row
+        if created_at + self.ttl < time.time():
+            self.delete(key)
+            return None
+        return json.loads(content)
+
+    def set(self, key, course_title, content):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO content_cache (cache_key, course_title, content, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, course_title, json.dumps(content), time.time()),
+            )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM content_cache WHERE cache_key = ?", (key,))
+
+    def titles_since(self, created_after):
+        return self._connect().execute(
+            "SELECT course_title, created_at FROM content_cache"
+            " WHERE created_at > ? ORDER BY created_at",
+            (created_after,),
+        ).fetchall()
+
+
+class ContentCache:
+    """
+    Two-tier cache for generated course content: an in-process LRU in
+    front of a SQLite file shared by all workers
+    """
+
+    def __init__(self, memory=None, persistent=None):
+        self.memory = memory or MemoryCache()
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "persistent": 0}
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, course_title, count_miss=True):
+        key = normalize_title(course_title)
+        content = self.memory.get(key)
+        if content is not None:
+            self._count_hit("memory")
+            return content
+
+        if self.persistent is not None:
+            try:
+                content = self.persistent.get(key)
+            except sqlite3.Error as e:
+                logger.error("Content cache read error: %s", e)
+                self._count_error()
+                content = None
+            if content is not None:
+                self.memory.set(key, content)
+                self._count_hit("persistent")
+                return content
+
+        if count_miss:
+            with self._lock:
+                self.misses += 1
+        return None
+
+    def get_memory(self, course_title):
+        """Look up the in-process tier only, which never blocks on I/O"""
+        content = self.memory.get(normalize_title(course_title))
+        if content is not None:
+            self._count_hit("memory")
+        return content
+
+    def set(self, course_title, content):
+        key = normalize_title(course_title)
+        self.memory.set(key, content)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, course_title, content)
+            except sqlite3.Error as e:
+                logger.error("Content cache write error: %s", e)
+                self._count_error()
+
+    def delete(self, course_title):
+        key = normalize_title(course_title)
+        self.memory.delete(key)
+        if self.persistent is not None:
+            try:
+                self.persistent.delete(key)
+            except sqlite3.Error as e:
+                logger.error("Content cache delete error: %s", e)
+                self._count_error()
+
+    def titles_since(self, created_after):
+        """
+        (course_title, created_at) pairs stored in the persistent tier after
+        the given timestamp, oldest first
+        """
+        if self.persistent is None:
+            return []
+        try:
+            return self.persistent.titles_since(created_after)
+        except sqlite3.Error as e:
+            logger.error("Content cache read error: %s", e)
+            self._count_error()
+            return []
+
+    def stats(self):
+        """
+        Return hit/miss/eviction counters for monitoring
+        """
+        with self._lock:
+            return {
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "errors": self.errors,
+                "evictions": self.memory.evictions,
+                "expirations": self.memory.expirations,
+                "memory_entries": len(self.memory),
+            }
+
+    def _count_hit(self, tier):
+        with self._lock:
+            self.hits[tier] += 1
+
+    def _count_error(self):
+        with self._lock:
+            self.errors += 1
+
+
+def create_cache(path=CACHE_DB_PATH, max_entries=CACHE_MAX_ENTRIES):
+    """Build a two-tier cache, falling back to memory only if the SQLite file is unusable"""
+    persistent = None
+    if path:
+        try:
+            persistent = SQLiteCache(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Persistent content cache unavailable, using memory only: %s", e)
+    return ContentCache(memory=MemoryCache(max_entries=max_entries), persistent=persistent)
+
+
+content_cache = create_cache()
@@ -0,0 +1,336 @@
+"""
+Searchable library of every generated course, stored in the database.
+
+Generations are handed to a background writer thread, so saving a course
+never adds a database round trip to the request that generated it, and
+the writer can save from job runner, pre-warm and ASGI threads alike.
+Listings page by (created_at, id) keysets and search results by
+(score, id) keysets, so deep pages cost the same as the first one.
+Search uses the FTS5 table on SQLite and the tsvector column on
+PostgreSQL (see models.py).
+"""
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
+
+from content_cache import normalize_title
+from database import db
+from models import Course, CourseObjective, SyllabusWeek, Reading
+
+logger = logging.getLogger(__name__)
+
+# Configure the course library from the environment
+COURSE_LIBRARY_ENABLED = os.environ.get("COURSE_LIBRARY_ENABLED", "true").lower() in ("1", "true", "yes")
+COURSE_LIBRARY_QUEUE_SIZE = int(os.environ.get("COURSE_LIBRARY_QUEUE_SIZE", "1000"))
+COURSE_LIBRARY_BATCH_SIZE = int(os.environ.get("COURSE_LIBRARY_BATCH_SIZE", "50"))
+
+MAX_PAGE_SIZE = 100
+SEARCH_MAX_TERMS = 8
+
+_STOP = object()
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded"""
+
+
+def _clip(value, length):
+    return str(value)[:length] if value is not None else None
+
+
+def _search_text(content):
+    """Objectives, syllabus topics and descriptions, and readings as one searchable text"""
+    parts = [item.get('objective') for item in content.get('course_objectives', [])]
+    for week in content.get('syllabus', []):
+        parts += [week.get('topic'), week.get('description')]
+    for reading in content.get('recommended_readings', []):
+        parts += [reading.get('title'), reading.get('author'), reading.get('description')]
+    return "\n".join(str(part) for part in parts if part)
+
+
+def save_course(course_title, content):
+    """
+    Insert or replace the library entry for a course title. Adds to the
+    current session; the caller commits.
+    """
+    key = normalize_title(course_title)
+    course = db.session.execute(db.select(Course).filter_by(normalized_title=key)).scalar_one_or_none()
+    if course is None:
+        course = Course(normalized_title=key)
+        db.session.add(course)
+
+    course.course_title = _clip(course_title.strip(), 200)
+    course.content = json.dumps(content)
+    course.search_text = _search_text(content)
+    course.objectives = [
+        CourseObjective(position=i, objective=str(item.get('objective', '')),
+                        bloom_level=_clip(item.get('bloom_level'), 64))
+        for i, item in enumerate(content.get('course_objectives', []))
+    ]
+    course.syllabus_weeks = [
+        SyllabusWeek(position=i, week=_clip(item.get('week'), 32), topic=str(item.get('topic', '')),
+                     description=item.get('description'))
+        for i, item in enumerate(content.get('syllabus', []))
+    ]
+    course.readings = [
+        Reading(position=i, title=str(item.get('title', '')), author=item.get('author'),
+                type=_clip(item.get('type'), 64), description=item.get('description'))
+        for i, item in enumerate(content.get('recommended_readings', []))
+    ]
+    return course
+
+
+def encode_cursor(*values):
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def _page_size(limit):
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def _summary_query():
+    # Listings don't need the stored content or search text
+    return db.select(Course).options(
+        load_only(Course.id, Course.course_title, Course.created_at, Course.updated_at)
+    )
+
+
+def list_courses(limit=20, cursor=None):
+    """
+    One page of courses, newest first. Returns (courses, next_cursor);
+    next_cursor is None on the last page.
+    """
+    limit = _page_size(limit)
+    query = _summary_query().order_by(Course.created_at.desc(), Course.id.desc())
+    if cursor:
+        created_at, course_id = decode_cursor(cursor)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+            course_id = int(course_id)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+        query = query.where(db.or_(
+            Course.created_at < created_at,
+            db.and_(Course.created_at == created_at, Course.id < course_id),
+        ))
+
+    courses = db.session.execute(query.limit(limit + 1)).scalars().all()
+    next_cursor = None
+    if len(courses) > limit:
+        courses = courses[:limit]
+        last = courses[-1]
+        next_cursor = encode_cursor(last.created_at.isoformat(), last.id)
+    return courses, next_cursor
+
+
+def get_course(course_id):
+    """A course with its objectives, syllabus and readings, or None"""
+    return db.session.execute(
+        db.select(Course).where(Course.id == course_id).options(
+            selectinload(Course.objectives), selectinload(Course.syllabus_weeks), selectinload(Course.readings)
+        )
+    ).scalar_one_or_none()
+
+
+def search_terms(query):
+    return re.findall(r"\w+", (query or "").casefold())[:SEARCH_MAX_TERMS]
+
+
+def _ranked_ids_sql(dialect, terms):
+    """
+    SQL returning (id, score) for courses matching every term, the last
+    one as a prefix, and the bound query string. Lower scores rank higher.
+    """
+    if dialect == 'sqlite':
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        # Title matches weigh ten times as much as matches in the body
+        return ("SELECT rowid AS id, bm25(course_search, 10.0, 1.0) AS score "
+                "FROM course_search WHERE course_search MATCH :query"), match
+    if dialect == 'postgresql':
+        match = " & ".join(terms) + ":*"
+        return ("SELECT id, -ts_rank(search_vector, tsq) AS score "
+                "FROM courses, to_tsquery('english', :query) tsq WHERE search_vector @@ tsq"), match
+    return None, None
+
+
+def search_courses(query, limit=20, cursor=None):
+    """
+    Courses whose title, objectives, syllabus or readings match every word
+    of query, best match first. Returns (courses, next_cursor).
+    """
+    limit = _page_size(limit)
+    terms = search_terms(query)
+    if not terms:
+        return [], None
+
+    ranked_sql, match = _ranked_ids_sql(db.engine.dialect.name, terms)
+    if ranked_sql is None:
+        return _search_courses_like(terms, limit, cursor)
+
+    params = {'query': match, 'limit': limit + 1}
+    keyset = ""
+    if cursor:
+        after_score, after_id = decode_cursor(cursor)
+        try:
+            params['after_score'], params['after_id'] = float(after_score), int(after_id)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+        keyset = "WHERE score > :after_score OR (score = :after_score AND id > :after_id) "
+    rows = db.session.execute(db.text(
+        f"SELECT id, score FROM ({ranked_sql}) ranked {keyset}ORDER BY score, id LIMIT :limit"
+    ), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+    courses = {
+        course.id: course
+        for course in db.session.execute(_summary_query().where(Course.id.in_([row.id for row in rows]))).scalars()
+    }
+    return [courses[row.id] for row in rows if row.id in courses], next_cursor
+
+
+def _search_courses_like(terms, limit, cursor):
+    """Unranked substring search, newest first, for databases without full-text support"""
+    query = _summary_query().where(*(
+        db.or_(Course.course_title.ilike(f"%{term}%"), Course.search_text.ilike(f"%{term}%"))
+        for term in terms
+    )).order_by(Course.id.desc())
+    if cursor:
+        _, after_id = decode_cursor(cursor)
+        try:
+            query = query.where(Course.id < int(after_id))
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid cursor") from e
+    courses = db.session.execute(query.limit(limit + 1)).scalars().all()
+    next_cursor = None
+    if len(courses) > limit:
+        courses = courses[:limit]
+        next_cursor = encode_cursor(None, courses[-1].id)
+    return courses, next_cursor
+
+
+class CourseLibrary:
+    """
+    Saves generated courses from a background thread in batches. Courses
+    queued while the database is unavailable or the queue is full are
+    dropped; the content cache still serves them.
+    """
+
+    def __init__(self, enabled=COURSE_LIBRARY_ENABLED, queue_size=COURSE_LIBRARY_QUEUE_SIZE,
+                 batch_size=COURSE_LIBRARY_BATCH_SIZE):
+        self.enabled = enabled
+        self.batch_size = max(1, batch_size)
+        self.app = None
+        self.saved = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name="course-library", daemon=True)
+            self._thread.start()
+            # Short-lived processes (flask prewarm) exit right after their last generation
+            atexit.register(self.close)
+
+    def add(self, course_title, content):
+        """Queue a generated course to be saved"""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait((course_title, content))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Course library queue full, not saving %s", course_title)
+
+    def close(self, timeout=10):
+        """Save everything queued so far and stop the writer thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Later generations of the same title replace earlier ones
+            courses = {normalize_title(item[0]): item for item in batch if item is not _STOP}
+            if courses:
+                self._save_batch(list(courses.values()))
+            if any(item is _STOP for item in batch):
+                return
+
+    def _save_batch(self, courses):
+        with self.app.app_context():
+            try:
+                try:
+                    for course_title, content in courses:
+                        save_course(course_title, content)
+                    db.session.commit()
+                    self.saved += len(courses)
+                except IntegrityError:
+                    # Another process inserted one of these titles first; save one by one
+                    db.session.rollback()
+                    for course_title, content in courses:
+                        self._save_one(course_title, content)
+            except Exception as e:
+                db.session.rollback()
+                self.dropped += len(courses)
+                logger.error("Could not save %d courses to the library: %s", len(courses), e)
+            finally:
+                db.session.remove()
+
+    def _save_one(self, course_title, content):
+        try:
+            save_course(course_title, content)
+            db.session.commit()
+            self.saved += 1
+        except IntegrityError:
+            db.session.rollback()
+            # The competing insert is committed now, so this becomes an update
+            save_course(course_title, content)
+            db.session.commit()
+            self.saved += 1
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'queued': self._queue.qsize(),
+            'saved': self.saved,
+            'dropped': self.dropped,
+        }
+
+
+course_library = CourseLibrary()
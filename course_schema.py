@@ -0,0 +1,93 @@
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+
+
+class CourseItem(BaseModel):
+    # Models sometimes return weights or weeks as numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+
+class CourseObjective(CourseItem):
+    objective: str
+    bloom_level: str
+
+
+class SyllabusWeek(CourseItem):
+    week: str
+    topic: str
+    description: str
+
+
+class LearningOutcome(CourseItem):
+    outcome: str
+    bloom_level: str
+
+
+class AssessmentMethod(CourseItem):
+    method: str
+    description: str
+    weight: str
+
+
+class RecommendedReading(CourseItem):
+    title: str
+    author: str
+    type: str
+    description: str
+
+
+class CourseContent(BaseModel):
+    course_objectives: list[CourseObjective]
+    syllabus: list[SyllabusWeek]
+    learning_outcomes: list[LearningOutcome]
+    assessment_methods: list[AssessmentMethod]
+    recommended_readings: list[RecommendedReading]
+
+
+# Section name -> item model, in display order
+SECTION_MODELS = {
+    'course_objectives': CourseObjective,
+    'syllabus': SyllabusWeek,
+    'learning_outcomes': LearningOutcome,
+    'assessment_methods': AssessmentMethod,
+    'recommended_readings': RecommendedReading,
+}
+
+REQUIRED_SECTIONS = list(SECTION_MODELS)
+
+_item_adapters = {name: TypeAdapter(model) for name, model in SECTION_MODELS.items()}
+
+
+def validate_section(name, items):
+    """
+    Validate one section against its item model. Malformed items are
+    dropped; returns the cleaned list, or None when nothing usable is left.
+    """
+    if not isinstance(items, list):
+        return None
+
+    cleaned = []
+    for item in items:
+        try:
+            cleaned.append(_item_adapters[name].validate_python(item).model_dump())
+        except ValidationError:
+            continue
+    return cleaned or None
+
+
+def validate_sections(content):
+    """
+    Validate every required section of a course document. Returns a
+    (valid_sections, invalid_section_names) tuple.
+    """
+    valid = {}
+    invalid = []
+    if not isinstance(content, dict):
+        return valid, list(REQUIRED_SECTIONS)
+
+    for name in REQUIRED_SECTIONS:
+        cleaned = validate_section(name, content.get(name))
+        if cleaned is None:
+            invalid.append(name)
+        else:
+            valid[name] = cleaned
+    return valid, invalid
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+from html import escape
+
+# Exporters take an iterable of (course_title, content) pairs and yield the
+# document in chunks, so they can be streamed without building it in memory.
+
+
+def export_text(courses):
+    """Plain text export, one block per course"""
+    for course_index, (course_title, content) in enumerate(courses):
+        if course_index:
+            yield "\n\n"
+        yield f"Educational Content for: {course_title}\n"
+        yield "=" * 50 + "\n\n"
+
+        if 'course_objectives' in content:
+            yield "COURSE OBJECTIVES:\n"
+            for i, obj in enumerate(content['course_objectives'], 1):
+                yield f"{i}. {obj['objective']} ({obj['bloom_level']})\n"
+            yield "\n"
+
+        yield "LEARNING OUTCOMES:\n"
+        for i, outcome in enumerate(content['learning_outcomes'], 1):
+            yield f"{i}. {outcome['outcome']} ({outcome['bloom_level']})\n"
+        yield "\n"
+
+        yield "SAMPLE SYLLABUS:\n"
+        for week in content['syllabus']:
+            yield f"• {week['week']}: {week['topic']}\n"
+            yield f"  - {week['description']}\n"
+        yield "\n"
+
+        yield "ASSESSMENT METHODS:\n"
+        for assessment in content['assessment_methods']:
+            yield f"• {assessment['method']} ({assessment['weight']})\n"
+            yield f"  - {assessment['description']}\n"
+        yield "\n"
+
+        yield "RECOMMENDED READINGS:\n"
+        for reading in content['recommended_readings']:
+            yield f"• {reading['title']} by {reading['author']}\n"
+            yield f"  - Type: {reading['type']}\n"
+            yield f"  - {reading['description']}\n"
+
+
+def export_markdown(courses):
+    """Markdown export with a heading per course and section"""
+    for course_title, content in courses:
+        yield f"# {course_title}\n\n"
+
+        if 'course_objectives' in content:
+            yield "## Course Objectives\n\n"
+            for i, obj in enumerate(content['course_objectives'], 1):
+                yield f"{i}. {obj['objective']} *({obj['bloom_level']})*\n"
+            yield "\n"
+
+        yield "## Learning Outcomes\n\n"
+        for i, outcome in enumerate(content['learning_outcomes'], 1):
+            yield f"{i}. {outcome['outcome']} *({outcome['bloom_level']})*\n"
+        yield "\n"
+
+        yield "## Sample Syllabus\n\n"
+        yield "| Week | Topic | Description |\n|---|---|---|\n"
+        for week in content['syllabus']:
+            yield f"| {_md_cell(week['week'])} | {_md_cell(week['topic'])} | {_md_cell(week['description'])} |\n"
+        yield "\n"
+
+        yield "## Assessment Methods\n\n"
+        yield "| Method | Weight | Description |\n|---|---|---|\n"
+        for assessment in content['assessment_methods']:
+            yield (f"| {_md_cell(assessment['method'])} | {_md_cell(assessment['weight'])} "
+                   f"| {_md_cell(assessment['description'])} |\n")
+        yield "\n"
+
+        yield "## Recommended Readings\n\n"
+        for reading in content['recommended_readings']:
+            yield f"- **{reading['title']}** by {reading['author']} ({reading['type']})  \n"
+            yield f"  {reading['description']}\n"
+        yield "\n"
+
+
+def export_json(courses):
+    """JSON array of {course_title, content} objects"""
+    encoder = json.JSONEncoder(ensure_ascii=False)
+    yield "["
+    for i, (course_title, content) in enumerate(courses):
+        if i:
+            yield ","
+        yield from encoder.iterencode({'course_title': course_title, 'content': content})
+    yield "]\n"
+
+
+CSV_COLUMNS = ['course_title', 'section', 'week', 'topic', 'method', 'weight', 'description']
+
+
+def export_csv(courses):
+    """CSV of the syllabus and assessment methods, one row per item"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def row(values):
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield row(CSV_COLUMNS)
+    for course_title, content in courses:
+        for week in content['syllabus']:
+            yield row([course_title, 'syllabus', week['week'], week['topic'], '', '', week['description']])
+        for assessment in content['assessment_methods']:
+            yield row([course_title, 'assessment', '', '', assessment['method'],
+                       assessment['weight'], assessment['description']])
+
+
+def export_html(courses):
+    """Standalone, print-ready HTML document"""
+    yield ("<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+           "<title>Educational Content</title>\n<style>\n"
+           "body { font-family: Georgia, serif; max-width: 800px; margin: 2em auto; color: #222; }\n"
+           "h1 { border-bottom: 2px solid #007bff; padding-bottom: 0.2em; }\n"
+           "table { border-collapse: collapse; width: 100%; }\n"
+           "th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; vertical-align: top; }\n"
+           "section.course { page-break-after: always; }\n"
+           "@media print { body { margin: 0; } }\n"
+           "</style>\n</head>\n<body>\n")
+    for course_title, content in courses:
+        yield f"<section class=\"course\">\n<h1>{escape(course_title)}</h1>\n"
+
+        if 'course_objectives' in content:
+            yield "<h2>Course Objectives</h2>\n<ol>\n"
+            for obj in content['course_objectives']:
+                yield f"<li>{escape(obj['objective'])} <em>({escape(obj['bloom_level'])})</em></li>\n"
+            yield "</ol>\n"
+
+        yield "<h2>Learning Outcomes</h2>\n<ol>\n"
+        for outcome in content['learning_outcomes']:
+            yield f"<li>{escape(outcome['outcome'])} <em>({escape(outcome['bloom_level'])})</em></li>\n"
+        yield "</ol>\n"
+
+        yield "<h2>Sample Syllabus</h2>\n<table>\n<tr><th>Week</th><th>Topic</th><th>Description</th></tr>\n"
+        for week in content['syllabus']:
+            yield (f"<tr><td>{escape(week['week'])}</td><td>{escape(week['topic'])}</td>"
+                   f"<td>{escape(week['description'])}</td></tr>\n")
+        yield "</table>\n"
+
+        yield "<h2>Assessment Methods</h2>\n<table>\n<tr><th>Method</th><th>Weight</th><th>Description</th></tr>\n"
+        for assessment in content['assessment_methods']:
+            yield (f"<tr><td>{escape(assessment['method'])}</td><td>{escape(assessment['weight'])}</td>"
+                   f"<td>{escape(assessment['description'])}</td></tr>\n")
+        yield "</table>\n"
+
+        yield "<h2>Recommended Readings</h2>\n<ul>\n"
+        for reading in content['recommended_readings']:
+            yield (f"<li><strong>{escape(reading['title'])}</strong> by {escape(reading['author'])} "
+                   f"({escape(reading['type'])})<br>{escape(reading['description'])}</li>\n")
+        yield "</ul>\n</section>\n"
+    yield "</body>\n</html>\n"
+
+
+def _md_cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+# Export format name -> (mimetype, file extension, exporter)
+EXPORT_FORMATS = {
+    'txt': ('text/plain', 'txt', export_text),
+    'md': ('text/markdown', 'md', export_markdown),
+    'json': ('application/json', 'json', export_json),
+    'csv': ('text/csv', 'csv', export_csv),
+    'html': ('text/html', 'html', export_html),
+}
+
+
+def negotiate_format(requested, accept_mimetypes, default='txt'):
+    """
+    Pick an export format from an explicit format name, falling back to
+    the first format the Accept header names and then the default.
+    Browsers list text/html on every navigation, so HTML export is only
+    chosen explicitly.
+    """
+    if requested:
+        return requested if requested in EXPORT_FORMATS else None
+
+    for mimetype, quality in accept_mimetypes or []:
+        if not quality or mimetype == 'text/html':
+            continue
+        for name, (format_mimetype, _, _) in EXPORT_FORMATS.items():
+            if format_mimetype == mimetype:
+                return name
+    return default
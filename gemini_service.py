@@ -1,11 +1,14 @@
 import json
 import logging
-import os
 
-from google import genai
 from google.genai import types
 from pydantic import BaseModel
 
+from llm_backends import get_backend
+from media_ingest import analyze_media
+
+logger = logging.getLogger(__name__)
+
 
 # IMPORTANT: KEEP THIS COMMENT
 # Follow these instructions when using this blueprint:
@@ -14,9 +17,9 @@ from pydantic import BaseModel
 # - Sometimes the google genai SDK has occasional type errors. You might need to run to validate, at time.  
 # The SDK was recently renamed from google-generativeai to google-genai. This file reflects the new name and the new APIs.
 
-# This API key is from Gemini Developer API Key, not vertex AI API Key
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-client = genai.Client(api_key=GEMINI_API_KEY) if GEMINI_API_KEY else None
+# The API key (GEMINI_API_KEY) is from Gemini Developer API Key, not vertex AI API Key.
+# The client is shared with openai_service through the configured LLM backend.
+client = get_backend()
 
 
 def generate_educational_content_with_gemini(course_title: str) -> dict:
@@ -55,7 +58,7 @@ Please provide a detailed response in JSON format with the following structure:
 
 Ensure all content is academically rigorous, pedagogically sound, and appropriate for higher education."""
 
-    response = client.models.generate_content(
+    response = client.generate_content(
         model="gemini-2.5-flash",
         contents=prompt,
         config=types.GenerateContentConfig(
@@ -73,7 +76,7 @@ def summarize_article(text: str) -> str:
         return "Gemini API not available"
     
     prompt = f"Please summarize the following text concisely while maintaining key points:\n\n{text}"
-    response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+    response = client.generate_content(model="gemini-2.5-flash", contents=prompt)
     return response.text or "SOMETHING WENT WRONG"
 
 
@@ -95,7 +98,7 @@ def analyze_sentiment(text: str) -> Sentiment:
             "Respond with JSON in this format: "
             "{'rating': number, 'confidence': number}")
 
-        response = client.models.generate_content(
+        response = client.generate_content(
             model="gemini-2.5-pro",
             contents=[
                 types.Content(role="user", parts=[types.Part(text=text)])
@@ -108,7 +111,7 @@ def analyze_sentiment(text: str) -> Sentiment:
         )
 
         raw_json = response.text
-        logging.info(f"Raw JSON: {raw_json}")
+        logger.debug("Sentiment response: %d characters", len(raw_json or ""))
 
         if raw_json:
             data = json.loads(raw_json)
@@ -125,21 +128,14 @@ def analyze_image(jpeg_image_path: str) -> str:
     if not client:
         return "Gemini API not available"
     
-    with open(jpeg_image_path, "rb") as f:
-        image_bytes = f.read()
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Part.from_bytes(
-                    data=image_bytes,
-                    mime_type="image/jpeg",
-                ),
-                "Analyze this image in detail and describe its key " +
-                "elements, context, and any notable aspects.",
-            ],
-        )
-
-    return response.text if response.text else ""
+    return analyze_media(
+        client,
+        jpeg_image_path,
+        "image/jpeg",
+        "Analyze this image in detail and describe its key " +
+        "elements, context, and any notable aspects.",
+        model="gemini-2.5-pro",
+    )
 
 
 def analyze_video(mp4_video_path: str) -> str:
@@ -147,21 +143,15 @@ def analyze_video(mp4_video_path: str) -> str:
     if not client:
         return "Gemini API not available"
     
-    with open(mp4_video_path, "rb") as f:
-        video_bytes = f.read()
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Part.from_bytes(
-                    data=video_bytes,
-                    mime_type="video/mp4",
-                ),
-                "Analyze this video in detail and describe its key " +
-                "elements, context, and any notable aspects.",
-            ],
-        )
-
-    return response.text if response.text else ""
+    # Large videos are uploaded through the Files API instead of inline
+    return analyze_media(
+        client,
+        mp4_video_path,
+        "video/mp4",
+        "Analyze this video in detail and describe its key " +
+        "elements, context, and any notable aspects.",
+        model="gemini-2.5-pro",
+    )
 
 
 def generate_image(prompt: str, image_path: str) -> None:
@@ -169,7 +159,7 @@ def generate_image(prompt: str, image_path: str) -> None:
     if not client:
         raise Exception("Gemini API not available")
     
-    response = client.models.generate_content(
+    response = client.generate_content(
         # IMPORTANT: only this gemini model supports image generation
         model="gemini-2.0-flash-preview-image-generation",
         contents=prompt,
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from circuit_breaker import BREAKER_MAX_WORKERS
+from metrics import HEDGES, percentile
+
+logger = logging.getLogger(__name__)
+
+# Configure request hedging from the environment
+HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Send the hedge once the call is slower than this percentile of recent calls
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY_SECONDS = float(os.environ.get("HEDGE_MIN_DELAY", "2"))
+# Delay used until HEDGE_MIN_SAMPLES latencies have been observed
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.environ.get("HEDGE_DEFAULT_DELAY", "15"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.environ.get("HEDGE_WINDOW", "200"))
+# Extra calls (hedges and model fallbacks) allowed per primary call, and
+# how many may be saved up for a burst of slow calls
+HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", "0.1"))
+HEDGE_BUDGET_BURST = float(os.environ.get("HEDGE_BUDGET_BURST", "5"))
+# Primaries arrive from breaker pool threads, so the hedge pool has room for
+# all of them plus the burst of hedges. A call that still finds it full
+# runs unhedged on the calling thread instead of queueing.
+HEDGE_MAX_WORKERS = int(os.environ.get(
+    "HEDGE_MAX_WORKERS", str(BREAKER_MAX_WORKERS + math.ceil(HEDGE_BUDGET_BURST))
+))
+
+
+class Hedger:
+    """
+    Hedged calls with a fallback chain. The primary call runs first; if it
+    hasn't answered by the hedge deadline (a percentile of recent primary
+    latencies), the first alternate is sent too and whichever succeeds
+    first wins. If a call fails, the next alternate is tried. Every extra
+    call spends from a token budget refilled by primary calls, so extra
+    calls stay below HEDGE_BUDGET of the primary volume.
+    """
+
+    def __init__(self, name, enabled=HEDGE_ENABLED, percentile=HEDGE_PERCENTILE,
+                 min_delay=HEDGE_MIN_DELAY_SECONDS, default_delay=HEDGE_DEFAULT_DELAY_SECONDS,
+                 min_samples=HEDGE_MIN_SAMPLES, window=HEDGE_WINDOW, budget=HEDGE_BUDGET,
+                 burst=HEDGE_BUDGET_BURST, max_workers=HEDGE_MAX_WORKERS):
+        self.name = name
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.budget = budget
+        self.burst = burst
+        self.max_workers = max_workers
+        self._latencies = deque(maxlen=window)
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+
+    def hedge_delay(self):
+        """Seconds to wait for the primary call before hedging"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, percentile(latencies, self.percentile))
+
+    def _record_latency(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def _withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def _submit(self, fn):
+        """
+        Run fn on the pool if a thread is free, else return None. Returns
+        (future, started_at) once fn has begun running.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers:
+                return None
+            self._in_flight += 1
+
+        started = threading.Event()
+        started_at = []
+
+        def run():
+            started_at.append(time.monotonic())
+            started.set()
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+        future = self._get_executor().submit(run)
+        # A thread was free, so this returns as soon as fn starts
+        started.wait()
+        return future, started_at[0]
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"hedge-{self.name}"
+                    )
+        return self._executor
+
+    def _next_attempt(self, alternates, kind):
+        """The next alternate if the budget allows one more call, else None"""
+        attempt = next(alternates, None)
+        if attempt is None:
+            return None
+        if not self._withdraw():
+            HEDGES.inc(self.name, "budget_exhausted")
+            return None
+        HEDGES.inc(self.name, kind)
+        return attempt
+
+    def _start_attempt(self, alternates, kind):
+        """Start the next alternate on the pool if the budget and the pool allow it"""
+        attempt = self._next_attempt(alternates, kind)
+        if attempt is None:
+            return None
+        submitted = self._submit(attempt)
+        if submitted is None:
+            self._refund()
+            HEDGES.inc(self.name, "saturated")
+            return None
+        return submitted[0]
+
+    def call(self, primary, alternates=()):
+        """
+        Call primary() with hedging. alternates are zero-argument callables
+        tried in order for the hedge and for fallbacks after errors; with
+        none, the hedge repeats the primary call.
+        """
+        if not self.enabled:
+            return primary()
+
+        self._deposit()
+        alternates = iter(list(alternates) or [primary])
+        submitted = self._submit(primary)
+        if submitted is None:
+            HEDGES.inc(self.name, "saturated")
+            return primary()
+
+        # Deadlines and latency samples count from when the primary started
+        primary_future, start = submitted
+
+        def record_primary(future):
+            # Learn from the primary's full latency even when a hedge wins
+            if not future.cancelled() and future.exception() is None:
+                self._record_latency(time.monotonic() - start)
+        primary_future.add_done_callback(record_primary)
+
+        futures = {primary_future: "primary"}
+        hedge_at = start + self.hedge_delay()
+        may_hedge = True
+        last_error = None
+        while futures:
+            timeout = max(0.0, hedge_at - time.monotonic()) if may_hedge else None
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                may_hedge = False
+                future = self._start_attempt(alternates, "hedge")
+                if future is not None:
+                    logger.info("Hedging slow %s call after %.1fs", self.name, time.monotonic() - start)
+                    futures[future] = "hedge"
+                continue
+
+            for future in done:
+                label = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("%s %s call failed: %s", self.name, label, e)
+                    last_error = e
+                    continue
+                # Calls already running can't be interrupted; their results are discarded
+                HEDGES.inc(self.name, f"{label}_won")
+                return result
+
+            if not futures:
+                may_hedge = False
+                future = self._start_attempt(alternates, "fallback")
+                if future is not None:
+                    futures[future] = "fallback"
+        raise last_error
+
+    async def call_async(self, primary, alternates=()):
+        """Async counterpart of call for coroutine functions; losing calls are cancelled"""
+        if not self.enabled:
+            return await primary()
+
+        self._deposit()
+        alternates = iter(list(alternates) or [primary])
+        start = time.monotonic()
+        primary_task = asyncio.ensure_future(primary())
+
+        def record_primary(task):
+            # A primary cancelled because a hedge won took at least this long
+            if task.cancelled() or task.exception() is None:
+                self._record_latency(time.monotonic() - start)
+        primary_task.add_done_callback(record_primary)
+
+        tasks = {primary_task: "primary"}
+        hedge_at = start + self.hedge_delay()
+        may_hedge = True
+        last_error = None
+        try:
+            while tasks:
+                timeout = max(0.0, hedge_at - time.monotonic()) if may_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    may_hedge = False
+                    attempt = self._next_attempt(alternates, "hedge")
+                    if attempt is not None:
+                        logger.info("Hedging slow %s call after %.1fs", self.name, time.monotonic() - start)
+                        tasks[asyncio.ensure_future(attempt())] = "hedge"
+                    continue
+
+                for task in done:
+                    label = tasks.pop(task)
+                    if task.exception() is not None:
+                        logger.warning("%s %s call failed: %s", self.name, label, task.exception())
+                        last_error = task.exception()
+                        continue
+                    HEDGES.inc(self.name, f"{label}_won")
+                    return task.result()
+
+                if not tasks:
+                    may_hedge = False
+                    attempt = self._next_attempt(alternates, "fallback")
+                    if attempt is not None:
+                        tasks[asyncio.ensure_future(attempt())] = "fallback"
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            tokens = self._tokens
+        return {
+            'enabled': self.enabled,
+            'hedge_delay': self.hedge_delay(),
+            'samples': len(latencies),
+            'budget_tokens': round(tokens, 2),
+            'in_flight': self._in_flight,
+            'max_workers': self.max_workers,
+        }
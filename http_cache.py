@@ -0,0 +1,180 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Configure HTTP caching and compression from the environment
+COMPRESS_MIN_BYTES = int(os.environ.get("HTTP_COMPRESS_MIN_BYTES", "500"))
+GZIP_LEVEL = int(os.environ.get("HTTP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", "5"))
+STATIC_MAX_AGE_SECONDS = 365 * 24 * 3600
+STATIC_COMPRESS_MAX_BYTES = 1024 * 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/markdown',
+    'text/javascript', 'application/javascript', 'application/json', 'image/svg+xml',
+}
+
+# Compressed bodies of responses with an ETag (mostly static assets), keyed
+# by (etag, encoding), so they are compressed once rather than per request
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+COMPRESSED_CACHE_ENTRIES = 256
+
+_static_versions = {}
+
+
+def content_etag(*parts):
+    """Validator for a response derived from the given JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def is_not_modified(etag):
+    return request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag)
+
+
+def set_validators(response, etag):
+    """
+    Mark a response as shared but always revalidated, so repeat views cost
+    a 304 instead of a full body
+    """
+    # Weak, because the same validator covers every content encoding
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag):
+    return set_validators(Response(status=304), etag)
+
+
+def page_version(*folders):
+    """
+    Hash of the template and static sources, so page ETags change on deploy
+    while staying identical across workers. Pages embed fingerprinted
+    static URLs, so a deploy that changes only static files must change
+    page ETags too.
+    """
+    digest = hashlib.sha256()
+    for folder in folders:
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    digest.update(os.path.relpath(path, folder).encode("utf-8"))
+                    digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def static_version(static_folder, filename):
+    """Short content hash of a static file, recomputed when it changes"""
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _static_versions.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+        _static_versions[filename] = cached
+    return cached[1]
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def compress_response(response):
+    """Compress a buffered response body with brotli or gzip if the client accepts it"""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if response.direct_passthrough:
+        # Static files are passed through as file wrappers; read the small ones
+        if not response.content_length or response.content_length > STATIC_COMPRESS_MAX_BYTES:
+            return response
+        response.direct_passthrough = False
+    elif response.is_streamed:
+        # Buffering would defeat SSE, NDJSON and streamed downloads
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    etag, _ = response.get_etag()
+    cache_key = (etag, encoding) if etag else None
+    compressed = None
+    if cache_key is not None:
+        with _compressed_lock:
+            compressed = _compressed.get(cache_key)
+    if compressed is None:
+        compressed = _compress(data, encoding)
+        if cache_key is not None:
+            with _compressed_lock:
+                _compressed[cache_key] = compressed
+                while len(_compressed) > COMPRESSED_CACHE_ENTRIES:
+                    _compressed.popitem(last=False)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Byte ranges and strong validators refer to the uncompressed body
+    response.headers.pop('Accept-Ranges', None)
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Register compression, static fingerprinting and static cache headers"""
+
+    @app.url_defaults
+    def fingerprint_static_urls(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            version = static_version(app.static_folder, values['filename'])
+            if version:
+                values['v'] = version
+
+    @app.after_request
+    def apply_http_caching(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304):
+            if request.args.get('v'):
+                # Fingerprinted URLs change whenever the file does
+                response.cache_control.no_cache = None
+                response.cache_control.public = True
+                response.cache_control.max_age = STATIC_MAX_AGE_SECONDS
+                response.cache_control.immutable = True
+            else:
+                response.cache_control.no_cache = True
+        return compress_response(response)
@@ -0,0 +1,217 @@
+"""
+Background generation jobs persisted in the database.
+
+Web processes submit jobs and return a job ID immediately; runner threads
+claim queued jobs and call the generation service. Set JOB_WORKERS=0 on
+the web processes and run `python jobs.py` to scale generation capacity
+separately from web capacity.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from database import db
+from logging_config import request_id_var
+from models import GenerationJob
+from openai_service import get_educational_content_with_fallback
+
+logger = logging.getLogger(__name__)
+
+# Configure the job runner from the environment
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.environ.get("JOB_RETRY_BACKOFF", "2"))
+JOB_TIMEOUT_SECONDS = float(os.environ.get("JOB_TIMEOUT", "300"))
+JOB_POLL_INTERVAL_SECONDS = float(os.environ.get("JOB_POLL_INTERVAL", "1"))
+
+TERMINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+# Demo fallbacks caused by a transient upstream problem are worth retrying
+RETRYABLE_FALLBACKS = ('api_error', 'circuit_open', 'empty_response', 'json_error', 'invalid_structure')
+
+
+def submit_job(course_title):
+    """Queue a generation job and wake a local runner thread"""
+    job = GenerationJob(
+        id=uuid.uuid4().hex,
+        course_title=course_title,
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    db.session.add(job)
+    db.session.commit()
+    job_runner.notify()
+    return job
+
+
+def get_job(job_id):
+    return db.session.get(GenerationJob, job_id)
+
+
+def cancel_job(job_id):
+    """
+    Cancel a job. Queued jobs are cancelled immediately; a running job is
+    flagged and its result discarded when the upstream call returns.
+    """
+    job = get_job(job_id)
+    if job is None or job.status in TERMINAL_STATUSES:
+        return job
+
+    cancelled = db.session.execute(
+        db.update(GenerationJob)
+        .where(GenerationJob.id == job_id, GenerationJob.status == 'queued')
+        .values(status='cancelled', cancel_requested=True, finished_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if cancelled.rowcount == 0:
+        job.cancel_requested = True
+    db.session.commit()
+    db.session.refresh(job)
+    return job
+
+
+def _runnable(now):
+    """Queued jobs that are due, plus running jobs whose runner went away"""
+    return db.or_(
+        db.and_(GenerationJob.status == 'queued', GenerationJob.run_after <= now),
+        db.and_(GenerationJob.status == 'running',
+                GenerationJob.started_at < now - timedelta(seconds=JOB_TIMEOUT_SECONDS)),
+    )
+
+
+class JobRunner:
+    """
+    Pool of threads that claim and run generation jobs. Claims are atomic
+    updates, so several processes can share one jobs table.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.app = None
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        if self.workers > 0:
+            self.start()
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run_forever, name=f"job-runner-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Started %s generation job runner threads", self.workers)
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _run_forever(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    job = self._claim_next_job()
+                    if job is not None:
+                        # Tag log records from this job with its ID
+                        request_id_var.set(f"job-{job.id}")
+                        try:
+                            self._run_job(job)
+                        finally:
+                            request_id_var.set(None)
+                    db.session.remove()
+            except Exception as e:
+                logger.error("Job runner error: %s", e)
+                job = None
+                time.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+            if job is None:
+                self._wakeup.wait(JOB_POLL_INTERVAL_SECONDS)
+                self._wakeup.clear()
+
+    def _claim_next_job(self):
+        now = datetime.utcnow()
+        candidates = db.session.execute(
+            db.select(GenerationJob.id)
+            .where(_runnable(now))
+            .order_by(GenerationJob.run_after)
+            .limit(self.workers + 1)
+        ).scalars().all()
+
+        for job_id in candidates:
+            claimed = db.session.execute(
+                db.update(GenerationJob)
+                .where(GenerationJob.id == job_id, _runnable(now))
+                .values(status='running', started_at=now, attempts=GenerationJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if claimed.rowcount == 1:
+                return get_job(job_id)
+        return None
+
+    def _run_job(self, job):
+        if job.attempts > job.max_attempts:
+            self._finish(job, 'failed', error=job.error or 'Job timed out')
+            return
+
+        logger.info("Running generation job %s (attempt %s): %s", job.id, job.attempts, job.course_title)
+        content, fallback_reason, error = None, None, None
+        try:
+            content, fallback_reason = get_educational_content_with_fallback(job.course_title)
+        except Exception as e:
+            logger.error("Generation job %s failed: %s", job.id, e)
+            error = str(e)
+
+        # Pick up cancellation requests made while the upstream call was running
+        db.session.refresh(job)
+        if job.cancel_requested:
+            self._finish(job, 'cancelled')
+            return
+
+        retryable = error is not None or fallback_reason in RETRYABLE_FALLBACKS
+        if retryable and job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.error = error or f"Fell back to demo content: {fallback_reason}"
+            job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            db.session.commit()
+            logger.warning("Retrying generation job %s in %.0fs", job.id, delay)
+            return
+
+        if error is not None:
+            self._finish(job, 'failed', error=error)
+        else:
+            job.result = json.dumps(content)
+            job.fallback = fallback_reason
+            self._finish(job, 'succeeded', error=None)
+
+    def _finish(self, job, status, **fields):
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+job_runner = JobRunner()
+
+
+if __name__ == '__main__':
+    # Dedicated generation worker process; importing the app starts the
+    # runner threads configured by JOB_WORKERS
+    import app  # noqa: F401
+
+    logger.info("Generation worker running; press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,89 @@
+import json
+
+
+class SectionStreamParser:
+    """
+    Incrementally parse a streamed JSON object and report each top-level
+    member as soon as its value is complete, without waiting for the rest
+    of the document
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.finished = False
+
+    def feed(self, text):
+        """
+        Add a chunk of text and return a list of (key, value) pairs for
+        the members completed by it
+        """
+        self._buffer += text
+        sections = []
+        while not self.finished:
+            section = self._next_section()
+            if section is None:
+                break
+            sections.append(section)
+
+        # Drop consumed text so the buffer only holds the pending member
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return sections
+
+    def _skip_whitespace(self, pos):
+        while pos < len(self._buffer) and self._buffer[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+    def _next_section(self):
+        buf = self._buffer
+        pos = self._skip_whitespace(self._pos)
+
+        if not self._started:
+            if pos >= len(buf):
+                return None
+            if buf[pos] != "{":
+                raise ValueError("Streamed content is not a JSON object")
+            self._started = True
+            pos = self._skip_whitespace(pos + 1)
+            self._pos = pos
+
+        if pos < len(buf) and buf[pos] == ",":
+            pos = self._skip_whitespace(pos + 1)
+            self._pos = pos
+        if pos >= len(buf):
+            return None
+        if buf[pos] == "}":
+            self.finished = True
+            self._pos = pos + 1
+            return None
+
+        try:
+            key, pos = self._decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            return None
+        pos = self._skip_whitespace(pos)
+        if pos >= len(buf):
+            return None
+        if buf[pos] != ":":
+            raise ValueError("Malformed JSON object in stream")
+        pos = self._skip_whitespace(pos + 1)
+
+        try:
+            value, end = self._decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            return None
+
+        # A bare number or literal is only complete once a delimiter follows it
+        end_after = self._skip_whitespace(end)
+        if end_after >= len(buf):
+            return None
+        if buf[end_after] not in ",}":
+            raise ValueError("Malformed JSON object in stream")
+
+        self._pos = end_after
+        return key, value
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+# Select the backend: "gemini" for the real API, "stub" for load testing
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini").lower()
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# HTTP connection pool shared by every Gemini call in the process
+GEMINI_MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", "64"))
+GEMINI_MAX_KEEPALIVE = int(os.environ.get("GEMINI_MAX_KEEPALIVE", "32"))
+GEMINI_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("GEMINI_KEEPALIVE_EXPIRY", "60"))
+
+# "off", "import" to build the client in the background at startup, or
+# "connect" to also open a pooled connection to the API
+LLM_WARMUP = os.environ.get("LLM_WARMUP", "off").lower()
+
+# Stub backend behaviour
+STUB_LATENCY = os.environ.get("STUB_LATENCY", "lognormal:1.5:0.4")
+STUB_ERROR_RATE = float(os.environ.get("STUB_ERROR_RATE", "0"))
+STUB_MALFORMED_RATE = float(os.environ.get("STUB_MALFORMED_RATE", "0"))
+STUB_STREAM_CHUNKS = int(os.environ.get("STUB_STREAM_CHUNKS", "20"))
+STUB_SEED = os.environ.get("STUB_SEED")
+
+
+class LLMBackend:
+    """
+    Interface for text generation backends. Methods take the same model,
+    contents and config arguments as the google-genai client's
+    models.generate_content and return objects with a `text` attribute.
+    """
+    name = "base"
+
+    def generate_content(self, model, contents, config=None):
+        raise NotImplementedError
+
+    def generate_content_stream(self, model, contents, config=None, timeout=None):
+        """Iterate response chunks; timeout bounds the wait for each chunk"""
+        raise NotImplementedError
+
+    async def generate_content_async(self, model, contents, config=None):
+        raise NotImplementedError
+
+    def upload_file(self, path, mime_type):
+        raise NotImplementedError
+
+    def get_file(self, name):
+        raise NotImplementedError
+
+    def delete_file(self, name):
+        raise NotImplementedError
+
+    def warm_up(self, connect=False):
+        """Do the one-time setup a first request would otherwise pay for"""
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Backend for the Google Gemini API. The SDK is imported and the client
+    built on first use, so importing the app doesn't pay for either.
+    """
+    name = "gemini"
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self):
+        import httpx
+        from google import genai
+        from google.genai import types
+
+        start = time.perf_counter()
+        limits = httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+            keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        client = genai.Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(client_args={"limits": limits}, async_client_args={"limits": limits}),
+        )
+        logger.info("Gemini client created in %.0f ms", (time.perf_counter() - start) * 1000)
+        return client
+
+    def warm_up(self, connect=False):
+        client = self.client
+        if connect:
+            # Cheap metadata call that leaves a TLS connection in the pool
+            client.models.get(model="gemini-2.5-flash")
+
+    def generate_content(self, model, contents, config=None):
+        return self.client.models.generate_content(model=model, contents=contents, config=config)
+
+    def generate_content_stream(self, model, contents, config=None, timeout=None):
+        if timeout:
+            from google.genai import types
+            # The SDK applies this as the HTTP read timeout, i.e. per chunk
+            config = (config or types.GenerateContentConfig()).model_copy(
+                update={"http_options": types.HttpOptions(timeout=int(timeout * 1000))}
+            )
+        return self.client.models.generate_content_stream(model=model, contents=contents, config=config)
+
+    async def generate_content_async(self, model, contents, config=None):
+        return await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+
+    def upload_file(self, path, mime_type):
+        # The SDK sends the file from disk with a chunked resumable upload
+        from google.genai import types
+        return self.client.files.upload(file=path, config=types.UploadFileConfig(mime_type=mime_type))
+
+    def get_file(self, name):
+        return self.client.files.get(name=name)
+
+    def delete_file(self, name):
+        self.client.files.delete(name=name)
+
+
+class StubBackendError(Exception):
+    pass
+
+
+class LatencyDistribution:
+    """
+    Latency sampler parsed from a spec string:
+      fixed:SECONDS, uniform:LOW:HIGH, normal:MEAN:STDDEV,
+      lognormal:MEDIAN:SIGMA
+    """
+
+    def __init__(self, spec, rng):
+        kind, *params = spec.split(":")
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        self.rng = rng
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, self.rng.gauss(*self.params))
+        median, sigma = self.params
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+
+class StubBackend(LLMBackend):
+    """
+    Local backend that returns a well-formed course document after a
+    simulated latency, with configurable error and malformed-JSON rates.
+    Used for load testing without spending API quota.
+    """
+    name = "stub"
+
+    def __init__(self, latency=STUB_LATENCY, error_rate=STUB_ERROR_RATE,
+                 malformed_rate=STUB_MALFORMED_RATE, seed=STUB_SEED):
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self.files = {}
+
+    def _plan(self):
+        """Sample the latency and outcome for one call"""
+        with self._lock:
+            self.calls += 1
+            return self.latency.sample(), self.rng.random(), self.rng.random()
+
+    def _respond(self, contents, error_roll, malformed_roll):
+        if error_roll < self.error_rate:
+            raise StubBackendError("Simulated upstream error")
+
+        text = json.dumps(stub_course_document(_prompt_title(contents)))
+        if malformed_roll < self.malformed_rate:
+            text = text[:len(text) // 2]
+        return _stub_response(text, contents)
+
+    def generate_content(self, model, contents, config=None):
+        latency, error_roll, malformed_roll = self._plan()
+        time.sleep(latency)
+        return self._respond(contents, error_roll, malformed_roll)
+
+    def generate_content_stream(self, model, contents, config=None, timeout=None):
+        latency, error_roll, malformed_roll = self._plan()
+        chunk_delay = latency / max(1, STUB_STREAM_CHUNKS)
+        if timeout and chunk_delay > timeout:
+            time.sleep(timeout)
+            raise StubBackendError("Simulated read timeout")
+        time.sleep(chunk_delay)
+        response = self._respond(contents, error_roll, malformed_roll)
+        size = max(1, len(response.text) // max(1, STUB_STREAM_CHUNKS))
+        for start in range(0, len(response.text), size):
+            yield SimpleNamespace(text=response.text[start:start + size])
+            time.sleep(chunk_delay)
+
+    async def generate_content_async(self, model, contents, config=None):
+        latency, error_roll, malformed_roll = self._plan()
+        await asyncio.sleep(latency)
+        return self._respond(contents, error_roll, malformed_roll)
+
+    def upload_file(self, path, mime_type):
+        with self._lock:
+            name = f"files/stub-{len(self.files) + 1}"
+            self.files[name] = SimpleNamespace(name=name, uri=f"stub://{name}", mime_type=mime_type,
+                                               size_bytes=os.path.getsize(path), state="ACTIVE")
+            return self.files[name]
+
+    def get_file(self, name):
+        return self.files[name]
+
+    def delete_file(self, name):
+        with self._lock:
+            self.files.pop(name, None)
+
+
+def _prompt_text(contents):
+    if isinstance(contents, str):
+        return contents
+    parts = []
+    for content in contents or []:
+        for part in getattr(content, "parts", None) or []:
+            if getattr(part, "text", None):
+                parts.append(part.text)
+    return "\n".join(parts)
+
+
+def _prompt_title(contents):
+    match = re.search(r'for the course: "([^"]*)"', _prompt_text(contents))
+    return match.group(1) if match else "Stub Course"
+
+
+def _stub_response(text, contents):
+    usage = SimpleNamespace(
+        prompt_token_count=len(_prompt_text(contents)) // 4,
+        candidates_token_count=len(text) // 4,
+    )
+    return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+def stub_course_document(course_title):
+    """A small but structurally complete course document"""
+    return {
+        "course_objectives": [
+            {"objective": f"Understand the foundations of {course_title}", "bloom_level": "Understanding"},
+            {"objective": f"Apply core techniques from {course_title}", "bloom_level": "Applying"},
+            {"objective": f"Design projects in {course_title}", "bloom_level": "Creating"},
+        ],
+        "syllabus": [
+            {"week": f"Week {i}", "topic": f"{course_title} topic {i}", "description": f"Stub description for week {i}"}
+            for i in range(1, 9)
+        ],
+        "learning_outcomes": [
+            {"outcome": f"Explain key ideas in {course_title}", "bloom_level": "Understanding"},
+            {"outcome": f"Analyze problems in {course_title}", "bloom_level": "Analyzing"},
+            {"outcome": f"Evaluate approaches to {course_title}", "bloom_level": "Evaluating"},
+        ],
+        "assessment_methods": [
+            {"method": "Examination", "description": "Written examination", "weight": "50%"},
+            {"method": "Project", "description": "Course project", "weight": "50%"},
+        ],
+        "recommended_readings": [
+            {"title": f"Introduction to {course_title}", "author": "Stub Author", "type": "Textbook",
+             "description": "Stub reading"},
+            {"title": f"Advanced {course_title}", "author": "Stub Author", "type": "Reference Book",
+             "description": "Stub reading"},
+        ],
+    }
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name=LLM_BACKEND):
+    """Create the configured backend, or None when Gemini has no API key"""
+    if name == "stub":
+        logger.info("Using stub LLM backend")
+        return StubBackend()
+    if name != "gemini":
+        raise ValueError(f"Unknown LLM backend: {name}")
+    if not GEMINI_API_KEY:
+        logger.warning("No Gemini API key found in environment")
+        return None
+    logger.info("Gemini backend configured; the client is created on first use")
+    return GeminiBackend(GEMINI_API_KEY)
+
+
+def get_backend():
+    """Return the process-wide backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend() or False
+    return _backend or None
+
+
+def warm_up(mode=LLM_WARMUP):
+    """
+    Warm the shared backend on a background thread so the first request
+    doesn't pay for SDK imports, client setup or the TLS handshake
+    """
+    backend = get_backend()
+    if backend is None or mode not in ("import", "connect"):
+        return None
+
+    def run():
+        start = time.perf_counter()
+        try:
+            # Request builders use the SDK's types module with every backend
+            from google.genai import types  # noqa: F401
+            backend.warm_up(connect=mode == "connect")
+        except Exception as e:
+            logger.warning("LLM backend warm-up failed: %s", e)
+            return
+        logger.info("LLM backend warmed up in %.0f ms", (time.perf_counter() - start) * 1000)
+
+    thread = threading.Thread(target=run, name="llm-warmup", daemon=True)
+    thread.start()
+    return thread
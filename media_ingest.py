@@ -0,0 +1,128 @@
+"""
+Size-aware media ingestion for Gemini analysis calls.
+
+Small files are read and sent inline. Anything above the inline limit is
+sent with the Files API, whose chunked upload streams it from disk, so a
+worker never holds more than MEDIA_INLINE_MAX_BYTES of a file in memory.
+Content hashes are computed over a memory map, without reading the file
+into memory. Results are cached by content hash, and at most
+MEDIA_CONCURRENCY analyses run at once per process.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import threading
+import time
+
+from google.genai import types
+
+from content_cache import create_cache
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Configure media ingestion from the environment
+# Files larger than this are hashed through a memory map rather than read
+MEDIA_READ_MAX_BYTES = int(os.environ.get("MEDIA_READ_MAX_BYTES", str(1024 * 1024)))
+# Inline data is copied into the request (and base64-encoded, so the API caps
+# it at about 14 MB); larger files are uploaded from disk instead
+MEDIA_INLINE_MAX_BYTES = int(os.environ.get("MEDIA_INLINE_MAX_BYTES", str(1024 * 1024)))
+MEDIA_CONCURRENCY = int(os.environ.get("MEDIA_CONCURRENCY", "2"))
+MEDIA_PROCESSING_TIMEOUT_SECONDS = float(os.environ.get("MEDIA_PROCESSING_TIMEOUT", "600"))
+MEDIA_POLL_INTERVAL_SECONDS = float(os.environ.get("MEDIA_POLL_INTERVAL", "2"))
+MEDIA_CACHE_PATH = os.environ.get("MEDIA_CACHE_PATH", os.path.join("instance", "media_cache.sqlite3"))
+
+media_cache = create_cache(MEDIA_CACHE_PATH, max_entries=128)
+media_flight = SingleFlight(lock_dir=None)
+_media_slots = threading.BoundedSemaphore(max(1, MEDIA_CONCURRENCY))
+
+
+class MediaProcessingError(Exception):
+    """Raised when an uploaded file does not become ready for analysis"""
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, read without loading it into memory"""
+    digest = hashlib.sha256()
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size > MEDIA_READ_MAX_BYTES:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+        else:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def analyze_media(client, path, mime_type, prompt, model="gemini-2.5-pro"):
+    """
+    Run a Gemini analysis prompt over a media file. Repeat analyses of the
+    same content with the same model and prompt are served from the cache,
+    and concurrent requests for the same content share one call.
+    """
+    digest = file_digest(path)
+    prompt_digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+    cache_key = f"{model}:{prompt_digest}:{digest}"
+
+    result = media_cache.get(cache_key)
+    if result is not None:
+        logger.debug("Media analysis cache hit for %s", digest)
+        return result
+
+    def analyze():
+        result = media_cache.get(cache_key, count_miss=False)
+        if result is not None:
+            return result
+        with _media_slots:
+            result = _analyze_file(client, path, mime_type, prompt, model)
+        if result:
+            media_cache.set(cache_key, result)
+        return result
+
+    return media_flight.do(cache_key, analyze)
+
+
+def _analyze_file(client, path, mime_type, prompt, model):
+    size = os.path.getsize(path)
+    if size > MEDIA_INLINE_MAX_BYTES:
+        return _analyze_uploaded(client, path, mime_type, prompt, model)
+
+    with open(path, "rb") as f:
+        part = types.Part.from_bytes(data=f.read(), mime_type=mime_type)
+
+    response = client.generate_content(model=model, contents=[part, prompt])
+    return response.text if response.text else ""
+
+
+def _analyze_uploaded(client, path, mime_type, prompt, model):
+    logger.info("Uploading %s (%d bytes) for analysis", os.path.basename(path), os.path.getsize(path))
+    uploaded = client.upload_file(path, mime_type)
+    try:
+        uploaded = _wait_until_active(client, uploaded)
+        part = types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type)
+        response = client.generate_content(model=model, contents=[part, prompt])
+        return response.text if response.text else ""
+    finally:
+        try:
+            client.delete_file(uploaded.name)
+        except Exception as e:
+            logger.warning("Could not delete uploaded file %s: %s", uploaded.name, e)
+
+
+def _state_name(uploaded):
+    state = getattr(uploaded, "state", None)
+    return getattr(state, "name", state)
+
+
+def _wait_until_active(client, uploaded):
+    """Poll an uploaded file until Gemini has finished processing it"""
+    deadline = time.monotonic() + MEDIA_PROCESSING_TIMEOUT_SECONDS
+    while _state_name(uploaded) == "PROCESSING":
+        if time.monotonic() > deadline:
+            raise MediaProcessingError(f"Timed out waiting for {uploaded.name} to be processed")
+        time.sleep(MEDIA_POLL_INTERVAL_SECONDS)
+        uploaded = client.get_file(uploaded.name)
+    if _state_name(uploaded) == "FAILED":
+        raise MediaProcessingError(f"Processing failed for {uploaded.name}")
+    return uploaded
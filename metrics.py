@@ -0,0 +1,192 @@
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list, or None if it is empty"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        key = tuple(str(value) for value in labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class CallbackMetric:
+    """Metric whose value is read from a callback at scrape time"""
+
+    def __init__(self, name, documentation, callback, type_name="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.type_name = type_name
+
+    def samples(self):
+        yield f"{self.name} {_format_value(self.callback())}"
+
+
+class Histogram:
+    """Cumulative histogram with optional labels"""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labelvalues, value):
+        key = tuple(str(v) for v in labelvalues)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labelvalues, value=time.perf_counter() - start)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._series.items())
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "edugen_stage_duration_seconds",
+    "Time spent in each stage of content generation",
+    labelnames=("stage",),
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "edugen_http_request_duration_seconds",
+    "Time to produce an HTTP response, by endpoint",
+    labelnames=("endpoint",),
+))
+HTTP_REQUESTS = registry.register(Counter(
+    "edugen_http_requests_total",
+    "HTTP requests by endpoint, method and status code",
+    labelnames=("endpoint", "method", "status"),
+))
+TOKENS = registry.register(Counter(
+    "edugen_llm_tokens_total",
+    "LLM tokens reported by the upstream usage metadata",
+    labelnames=("direction",),
+))
+HEDGES = registry.register(Counter(
+    "edugen_hedged_calls_total",
+    "Hedged upstream calls by call type and outcome",
+    labelnames=("call", "outcome"),
+))
+FALLBACKS = registry.register(Counter(
+    "edugen_fallbacks_total",
+    "Generations that fell back to demo content, by reason",
+    labelnames=("reason",),
+))
+
+
+def time_stage(stage):
+    """Context manager timing one generation stage"""
+    return STAGE_SECONDS.time(stage)
+
+
+def record_usage(response):
+    """Count the prompt and output tokens from a response's usage metadata"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for direction, attribute in (("input", "prompt_token_count"),
+                                 ("output", "candidates_token_count"),
+                                 ("thinking", "thoughts_token_count")):
+        count = getattr(usage, attribute, None)
+        if count:
+            TOKENS.inc(direction, amount=count)
+
+
+def record_fallback(reason):
+    if reason is not None:
+        FALLBACKS.inc(reason)
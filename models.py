@@ -0,0 +1,159 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import DDL, event
+
+from database import db
+
+
+class GenerationJob(db.Model):
+    """A queued course generation that clients poll for its result"""
+    __tablename__ = 'generation_jobs'
+    __table_args__ = (
+        db.Index('ix_generation_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    course_title = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    result = db.Column(db.Text)
+    fallback = db.Column(db.String(32))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        data = {
+            'job_id': self.id,
+            'course_title': self.course_title,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'fallback': self.fallback,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+        if self.result:
+            data['content'] = json.loads(self.result)
+        return data
+
+
+class Course(db.Model):
+    """A generated course kept in the searchable course library"""
+    __tablename__ = 'courses'
+    __table_args__ = (
+        # Keyset pagination over the newest courses
+        db.Index('ix_courses_created_at_id', 'created_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    course_title = db.Column(db.String(200), nullable=False)
+    normalized_title = db.Column(db.String(200), nullable=False, unique=True)
+    # Objectives, syllabus topics and descriptions, and readings, indexed for full-text search
+    search_text = db.Column(db.Text, nullable=False, default='')
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    objectives = db.relationship('CourseObjective', order_by='CourseObjective.position',
+                                 cascade='all, delete-orphan')
+    syllabus_weeks = db.relationship('SyllabusWeek', order_by='SyllabusWeek.position',
+                                     cascade='all, delete-orphan')
+    readings = db.relationship('Reading', order_by='Reading.position',
+                               cascade='all, delete-orphan')
+
+    def to_summary(self):
+        return {
+            'id': self.id,
+            'course_title': self.course_title,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def to_dict(self):
+        data = self.to_summary()
+        data['course_objectives'] = [item.to_dict() for item in self.objectives]
+        data['syllabus'] = [item.to_dict() for item in self.syllabus_weeks]
+        data['recommended_readings'] = [item.to_dict() for item in self.readings]
+        data['content'] = json.loads(self.content)
+        return data
+
+
+class CourseObjective(db.Model):
+    __tablename__ = 'course_objectives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    objective = db.Column(db.Text, nullable=False)
+    bloom_level = db.Column(db.String(64))
+
+    def to_dict(self):
+        return {'objective': self.objective, 'bloom_level': self.bloom_level}
+
+
+class SyllabusWeek(db.Model):
+    __tablename__ = 'syllabus_weeks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    week = db.Column(db.String(32))
+    topic = db.Column(db.Text, nullable=False)
+    description = db.Column(db.Text)
+
+    def to_dict(self):
+        return {'week': self.week, 'topic': self.topic, 'description': self.description}
+
+
+class Reading(db.Model):
+    __tablename__ = 'readings'
+
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False, index=True)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.Text, nullable=False)
+    author = db.Column(db.Text)
+    type = db.Column(db.String(64))
+    description = db.Column(db.Text)
+
+    def to_dict(self):
+        return {'title': self.title, 'author': self.author, 'type': self.type, 'description': self.description}
+
+
+# Full-text search index, created alongside the courses table. SQLite uses
+# an FTS5 table kept in sync by triggers; PostgreSQL a generated tsvector
+# column with a GIN index.
+for statement in (
+    "CREATE VIRTUAL TABLE course_search USING fts5("
+    "course_title, search_text, content='courses', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER courses_search_insert AFTER INSERT ON courses BEGIN "
+    "INSERT INTO course_search(rowid, course_title, search_text) "
+    "VALUES (new.id, new.course_title, new.search_text); END",
+    "CREATE TRIGGER courses_search_delete AFTER DELETE ON courses BEGIN "
+    "INSERT INTO course_search(course_search, rowid, course_title, search_text) "
+    "VALUES ('delete', old.id, old.course_title, old.search_text); END",
+    "CREATE TRIGGER courses_search_update AFTER UPDATE ON courses BEGIN "
+    "INSERT INTO course_search(course_search, rowid, course_title, search_text) "
+    "VALUES ('delete', old.id, old.course_title, old.search_text); "
+    "INSERT INTO course_search(rowid, course_title, search_text) "
+    "VALUES (new.id, new.course_title, new.search_text); END",
+):
+    event.listen(Course.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+for statement in (
+    "ALTER TABLE courses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', course_title), 'A') || "
+    "setweight(to_tsvector('english', search_text), 'B')) STORED",
+    "CREATE INDEX ix_courses_search_vector ON courses USING GIN (search_vector)",
+):
+    event.listen(Course.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+event.listen(Course.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS course_search").execute_if(dialect='sqlite'))
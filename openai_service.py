@@ -1,32 +1,62 @@
-from google import genai
-from google.genai import types
 import json
 import os
 import logging
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from content_cache import content_cache, normalize_title
+from single_flight import generation_flight, async_generation_flight, stream_flight
+from json_stream import SectionStreamParser
+from llm_backends import get_backend
+from circuit_breaker import upstream_breaker, CircuitOpenError, CallTimeoutError
+from hedging import Hedger
+from metrics import time_stage, record_usage, record_fallback, STAGE_SECONDS
+from title_index import title_index, TITLE_MATCH_MODE
+from course_library import course_library
+from course_schema import CourseContent, SECTION_MODELS, REQUIRED_SECTIONS, validate_section, validate_sections
 
-# Configure logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
-# Configure Gemini API
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+# Initialize the LLM backend (Gemini, or the stub selected by LLM_BACKEND)
+llm_backend = get_backend()
 
-# Initialize Gemini client
-gemini_client = None
-if GEMINI_API_KEY:
-    gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-    logging.info("Gemini client initialized successfully")
-else:
-    logging.warning("No Gemini API key found in environment")
+# Full courses and single sections have different latency profiles, so
+# each gets its own hedge deadline and budget
+course_hedger = Hedger("course")
+section_hedger = Hedger("section")
 
-def generate_educational_content(course_title):
+GEMINI_MODEL = "gemini-2.5-flash"
+# Models in order of preference: the first serves every request, the rest
+# take hedges of slow calls and fallbacks after errors. With one model,
+# hedges repeat the call on it.
+GEMINI_MODEL_CHAIN = [
+    model.strip() for model in os.environ.get("GEMINI_MODEL_CHAIN", GEMINI_MODEL).split(",") if model.strip()
+] or [GEMINI_MODEL]
+SYSTEM_PROMPT = "You are an expert educational content creator. Generate comprehensive course materials aligned with Bloom's Taxonomy levels. Respond in JSON format."
+
+# Upstream calls allowed in flight for a single batch request
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+
+# "single" asks for the whole course in one request; "sections" generates
+# each section as its own request, concurrently, and merges the results
+GENERATION_MODE = os.environ.get("GENERATION_MODE", "single").lower()
+
+# What each section should contain when it is generated on its own
+SECTION_DESCRIPTIONS = {
+    'course_objectives': "3-5 course objectives, each with the Bloom's Taxonomy level it targets",
+    'syllabus': "a week-by-week syllabus of 8-12 weeks, each with a topic and a short description",
+    'learning_outcomes': "3-5 measurable learning outcomes, each with its Bloom's Taxonomy level",
+    'assessment_methods': "2-4 assessment methods with a description and a percentage weight summing to 100%",
+    'recommended_readings': "3-5 recommended readings with title, author, type and a short description",
+}
+
+
+def build_course_prompt(course_title):
     """
-    Generate comprehensive educational content for a given course title
-    using Google Gemini API, aligned with Bloom's Taxonomy levels
+    Build the prompt asking Gemini for the full course structure as JSON
     """
-    logging.debug(f"Generating content for course: {course_title}")
-    
-    try:
-        prompt = f"""Create comprehensive educational content for the course: "{course_title}"
+    return f"""Create comprehensive educational content for the course: "{course_title}"
 
 Please provide a detailed response in JSON format with the following structure:
 {{
@@ -57,57 +87,628 @@ Please provide a detailed response in JSON format with the following structure:
 
 Ensure all content is academically rigorous, pedagogically sound, and appropriate for higher education."""
 
-        # Use Gemini API for content generation
-        if gemini_client:
-            try:
-                system_prompt = "You are an expert educational content creator. Generate comprehensive course materials aligned with Bloom's Taxonomy levels. Respond in JSON format."
-                
-                response = gemini_client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=[
-                        types.Content(role="user", parts=[types.Part(text=f"{system_prompt}\n\n{prompt}")])
-                    ],
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json",
-                        temperature=0.7
-                    )
-                )
-                logging.info("Successfully used Gemini for content generation")
-                
-                # Extract content from Gemini response
-                if hasattr(response, 'text') and response.text:
-                    content_text = response.text
-                else:
-                    logging.warning("Empty response from Gemini")
-                    return generate_demo_content(course_title)
-                    
-            except Exception as gemini_error:
-                logging.error(f"Gemini API error: {gemini_error}")
-                logging.warning("Gemini failed, falling back to demo mode")
-                return generate_demo_content(course_title)
-        else:
-            logging.warning("Gemini client not available, using demo content")
-            return generate_demo_content(course_title)
-            
-        content = json.loads(content_text)
-        
-        # Validate the structure
-        if validate_content_structure(content):
-            logging.info(f"Successfully generated educational content for: {course_title}")
-            return content
-        else:
-            logging.warning("Generated content structure invalid, falling back to demo mode")
-            return generate_demo_content(course_title)
-            
+
+def _course_request(course_title):
+    """
+    Build the Gemini request arguments for a full course generation
+    """
+    # Deferred so importing the app doesn't load the SDK
+    from google.genai import types
+
+    with time_stage("prompt_build"):
+        prompt = build_course_prompt(course_title)
+    return {
+        "model": GEMINI_MODEL_CHAIN[0],
+        "contents": [
+            types.Content(role="user", parts=[types.Part(text=f"{SYSTEM_PROMPT}\n\n{prompt}")])
+        ],
+        "config": types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=CourseContent,
+            temperature=0.7
+        ),
+    }
+
+
+def build_section_prompt(course_title, section):
+    """
+    Build the prompt asking Gemini for a single course section
+    """
+    return f"""For the course: "{course_title}", create {SECTION_DESCRIPTIONS[section]}.
+
+Respond with a JSON array only. Ensure all content is academically rigorous, pedagogically sound, and appropriate for higher education."""
+
+
+def _section_request(course_title, section):
+    """
+    Build the Gemini request arguments for generating one section
+    """
+    from google.genai import types
+
+    return {
+        "model": GEMINI_MODEL_CHAIN[0],
+        "contents": [
+            types.Content(role="user", parts=[types.Part(text=f"{SYSTEM_PROMPT}\n\n{build_section_prompt(course_title, section)}")])
+        ],
+        "config": types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=list[SECTION_MODELS[section]],
+            temperature=0.7
+        ),
+    }
+
+
+def _hedged_generate(hedger, request):
+    """Call generate_content down the model chain, hedging slow calls"""
+    primary, *alternates = [
+        partial(llm_backend.generate_content, **dict(request, model=model)) for model in GEMINI_MODEL_CHAIN
+    ]
+    return hedger.call(primary, alternates)
+
+
+async def _hedged_generate_async(hedger, request):
+    """Async counterpart of _hedged_generate"""
+    primary, *alternates = [
+        partial(llm_backend.generate_content_async, **dict(request, model=model)) for model in GEMINI_MODEL_CHAIN
+    ]
+    return await hedger.call_async(primary, alternates)
+
+
+def generate_section(course_title, section):
+    """
+    Generate a single section of a course. Returns the validated list of
+    items, or None if the upstream call or validation failed.
+    """
+    try:
+        with time_stage("upstream_section_call"):
+            response = upstream_breaker.call(
+                _hedged_generate, section_hedger, _section_request(course_title, section)
+            )
+    except Exception as e:
+        logger.error("Error generating section %s: %s", section, e)
+        return None
+    return _parse_section_response(section, response)
+
+
+async def generate_section_async(course_title, section):
+    """Async counterpart of generate_section"""
+    try:
+        with time_stage("upstream_section_call"):
+            response = await upstream_breaker.call_async(
+                _hedged_generate_async, section_hedger, _section_request(course_title, section)
+            )
+    except Exception as e:
+        logger.error("Error generating section %s: %s", section, e)
+        return None
+    return _parse_section_response(section, response)
+
+
+def _parse_section_response(section, response):
+    record_usage(response)
+    try:
+        items = json.loads(response.text) if response.text else None
     except json.JSONDecodeError as e:
-        logging.error(f"JSON decode error: {str(e)}")
-        logging.warning("JSON parsing failed, falling back to demo mode")
-        return generate_demo_content(course_title)
+        logger.error("JSON decode error in section %s: %s", section, e)
+        return None
+
+    # Accept either a bare array or an object wrapping it under the section name
+    if isinstance(items, dict):
+        items = items.get(section)
+    return validate_section(section, items)
+
+
+def _iter_generated_sections(course_title, sections):
+    """
+    Generate several sections concurrently, yielding (section, items) for
+    each one that succeeds as soon as it finishes
+    """
+    if not llm_backend or not sections:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix="section")
+    try:
+        futures = {executor.submit(generate_section, course_title, section): section for section in sections}
+        for future in as_completed(futures):
+            items = future.result()
+            if items is not None:
+                yield futures[future], items
+    finally:
+        # Don't wait for the remaining sections if the consumer went away
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _generate_sections(course_title, sections):
+    """
+    Generate several sections concurrently, returning a dict of the ones
+    that succeeded
+    """
+    return dict(_iter_generated_sections(course_title, sections))
+
+
+def generate_educational_content(course_title):
+    """
+    Generate comprehensive educational content for a given course title
+    using Google Gemini API, aligned with Bloom's Taxonomy levels
+    """
+    content, fallback_reason = _generate_content(course_title)
+    record_fallback(fallback_reason)
+    return content
+
+
+def get_educational_content(course_title):
+    """
+    Return educational content for a course title, serving repeat titles
+    from the content cache and only calling Gemini on a miss. Concurrent
+    misses for the same title share a single upstream call.
+    """
+    content, _ = get_educational_content_with_fallback(course_title)
+    return content
+
+
+def get_educational_content_with_fallback(course_title, match_similar=True):
+    """
+    Like get_educational_content, but returns a (content, fallback_reason)
+    tuple so callers can tell demo content apart from a real generation.
+    match_similar=False always generates rather than reusing a
+    near-duplicate title's content.
+    """
+    content = content_cache.get(course_title)
+    if content is not None:
+        logger.debug("Content cache hit for course: %s", course_title)
+        return content, None
+
+    content = _near_duplicate_content(course_title) if match_similar else None
+    if content is not None:
+        return content, None
+
+    return generation_flight.do(
+        normalize_title(course_title),
+        lambda: _load_or_generate_content(course_title)
+    )
+
+
+def _load_or_generate_content(course_title):
+    """
+    Generate and cache content for a title, unless another worker stored
+    it while this one was waiting for the generation lock
+    """
+    content = content_cache.get(course_title, count_miss=False)
+    if content is not None:
+        return content, None
+
+    content, fallback_reason = _generate_content(course_title)
+    record_fallback(fallback_reason)
+
+    # Demo content is cheap to rebuild, so only cache real generations
+    if fallback_reason is None:
+        _store_content(course_title, content)
+    return content, fallback_reason
+
+
+def _store_content(course_title, content):
+    """Cache a real generation and record it in the title index and course library"""
+    content_cache.set(course_title, content)
+    title_index.add(course_title)
+    course_library.add(course_title, content)
+
+
+def _near_duplicate_content(course_title):
+    """
+    Cached content of an already generated title that is a near duplicate
+    of this one, when TITLE_MATCH_MODE is "serve"
+    """
+    if TITLE_MATCH_MODE != 'serve':
+        return None
+    with time_stage("title_match"):
+        match = title_index.find(course_title)
+    if match is None:
+        return None
+    content = content_cache.get(match.course_title, count_miss=False)
+    if content is not None:
+        logger.info("Serving '%s' for near-duplicate title '%s' (similarity %.2f)",
+                    match.course_title, course_title, match.similarity)
+    return content
+
+
+def regenerate_section(course_title, section):
+    """
+    Regenerate one section of an already generated course and update the
+    cached course. Returns the updated content, or None if the course has
+    not been generated or the section could not be regenerated.
+    Concurrent requests for the same section share one upstream call.
+    """
+    if content_cache.get(course_title, count_miss=False) is None:
+        return None
+
+    def regenerate():
+        items = generate_section(course_title, section)
+        if items is None:
+            return None
+        # Re-read the course so sections regenerated concurrently are kept
+        content = content_cache.get(course_title, count_miss=False)
+        if content is None:
+            return None
+        content = {**content, section: items}
+        content_cache.set(course_title, content)
+        course_library.add(course_title, content)
+        return content
+
+    return generation_flight.do(f"{normalize_title(course_title)}#{section}", regenerate)
+
+
+def generate_batch(course_titles, concurrency=BATCH_CONCURRENCY):
+    """
+    Generate content for many course titles with at most `concurrency`
+    upstream calls in flight. Titles are deduplicated by normalized title
+    and a result dict is yielded for each one as soon as it finishes.
+    """
+    unique_titles = {}
+    for course_title in course_titles:
+        unique_titles.setdefault(normalize_title(course_title), course_title.strip())
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+    try:
+        futures = {
+            executor.submit(get_educational_content_with_fallback, course_title): course_title
+            for course_title in unique_titles.values()
+        }
+        for future in as_completed(futures):
+            course_title = futures[future]
+            try:
+                content, fallback_reason = future.result()
+            except Exception as e:
+                logger.error("Batch generation error for %s: %s", course_title, e)
+                yield {'course_title': course_title, 'success': False, 'error': str(e)}
+            else:
+                yield {
+                    'course_title': course_title,
+                    'success': True,
+                    'content': content,
+                    'fallback': fallback_reason
+                }
+    finally:
+        # Don't start queued titles if the caller stops consuming results
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def get_educational_content_async(course_title):
+    """
+    Async counterpart of get_educational_content for the ASGI entry point.
+    Concurrent misses for the same title within the event loop share a
+    single upstream call. Only the in-process cache tier is read on the
+    event loop; SQLite reads and writes, which can wait on other workers'
+    locks, run in worker threads.
+    """
+    content = content_cache.get_memory(course_title)
+    if content is None:
+        content = await asyncio.to_thread(content_cache.get, course_title)
+    if content is not None:
+        logger.debug("Content cache hit for course: %s", course_title)
+        return content
+
+    content = await asyncio.to_thread(_near_duplicate_content, course_title)
+    if content is not None:
+        return content
+
+    return await async_generation_flight.do(
+        normalize_title(course_title),
+        lambda: _load_or_generate_content_async(course_title)
+    )
+
+
+async def _load_or_generate_content_async(course_title):
+    content, fallback_reason = await _generate_content_async(course_title)
+    record_fallback(fallback_reason)
+    if fallback_reason is None:
+        await asyncio.to_thread(_store_content, course_title, content)
+    return content
+
+
+def stream_educational_content(course_title):
+    """
+    Stream educational content section by section. Yields (event, data)
+    pairs: a "section" event for each top-level section as soon as Gemini
+    has finished writing it, then a single "done" event. Concurrent
+    streams of the same title share one upstream call.
+    """
+    content = content_cache.get(course_title)
+    if content is None:
+        content = _near_duplicate_content(course_title)
+    if content is not None:
+        yield from _content_events(content, cached=True)
+        return
+
+    yield from stream_flight.subscribe(
+        normalize_title(course_title),
+        lambda emit: _produce_stream(course_title, emit)
+    )
+
+
+def _content_events(content, cached, fallback_reason=None):
+    for name, value in content.items():
+        yield "section", {"name": name, "content": value}
+    yield "done", {"cached": cached, "fallback": fallback_reason}
+
+
+def _produce_stream(course_title, emit):
+    """
+    Publish the stream events for a title. The generation runs as the
+    title's generation_flight call, so it also coalesces with
+    non-streaming generations: if one is already in flight, here or in
+    another worker, its result is published instead of streaming a
+    second upstream call.
+    """
+    streamed = []
+
+    def generate():
+        streamed.append(True)
+        # Another worker may have stored it while this one waited for the lock
+        content = content_cache.get(course_title, count_miss=False)
+        if content is not None:
+            for event, data in _content_events(content, cached=True):
+                emit(event, data)
+            return content, None
+        return _generate_streamed(course_title, emit)
+
+    content, fallback_reason = generation_flight.do(normalize_title(course_title), generate)
+    if not streamed:
+        for event, data in _content_events(content, cached=False, fallback_reason=fallback_reason):
+            emit(event, data)
+
+
+def _generate_streamed(course_title, emit):
+    """
+    Generate a course with a streaming upstream call, emitting each section
+    as soon as it is complete. Returns (content, fallback_reason) like
+    _load_or_generate_content.
+    """
+    sent = {}
+    fallback_reason = None
+    if llm_backend and GENERATION_MODE == 'sections':
+        for name, value in _iter_generated_sections(course_title, REQUIRED_SECTIONS):
+            sent[name] = value
+            emit("section", {"name": name, "content": value})
+        if len(sent) < len(REQUIRED_SECTIONS):
+            fallback_reason = "circuit_open" if upstream_breaker.state != 'closed' else "api_error"
+    elif llm_backend and not upstream_breaker.allow_request():
+        logger.warning("Gemini circuit open, streaming demo content")
+        fallback_reason = "circuit_open"
+    elif llm_backend:
+        parser = SectionStreamParser()
+        # The breaker's per-call timeout bounds both the wait for each chunk
+        # and the whole stream
+        timeout = upstream_breaker.timeout or None
+        start = time.monotonic()
+        upstream_ok = False
+        last_usage = None
+        chunks = None
+        try:
+            chunks = llm_backend.generate_content_stream(**_course_request(course_title), timeout=timeout)
+            for chunk in chunks:
+                if timeout and time.monotonic() - start > timeout:
+                    raise CallTimeoutError(f"Upstream stream exceeded {timeout:.0f}s")
+                # Usage metadata arrives with the final chunk
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    last_usage = chunk
+                if not chunk.text:
+                    continue
+                for name, value in parser.feed(chunk.text):
+                    sent[name] = value
+                    emit("section", {"name": name, "content": value})
+            upstream_ok = True
+            if not parser.finished:
+                fallback_reason = "json_error"
+        except ValueError as e:
+            logger.error("JSON stream error: %s", e)
+            upstream_ok = True
+            fallback_reason = "json_error"
+        except Exception as e:
+            logger.error("Gemini streaming error: %s", e)
+            fallback_reason = "api_error"
+        finally:
+            # Closing the stream releases its connection
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            elapsed = time.monotonic() - start
+            STAGE_SECONDS.observe("upstream_stream", value=elapsed)
+            if last_usage is not None:
+                record_usage(last_usage)
+            if upstream_ok:
+                upstream_breaker.record_success(elapsed)
+            else:
+                upstream_breaker.record_failure(elapsed)
+    else:
+        logger.warning("Gemini client not available, streaming demo content")
+        fallback_reason = "no_client"
+
+    sections, invalid = validate_sections(sent)
+    if fallback_reason is None and invalid:
+        fallback_reason = "invalid_structure"
+
+    # Regenerate only the sections the stream did not deliver intact
+    if fallback_reason in ("json_error", "invalid_structure") and sections:
+        repaired = _generate_sections(course_title, invalid)
+        for name, value in repaired.items():
+            sections[name] = value
+            emit("section", {"name": name, "content": value})
+        invalid = [name for name in invalid if name not in repaired]
+        if not invalid:
+            fallback_reason = None
+
+    if fallback_reason is None:
+        content = {name: sections[name] for name in REQUIRED_SECTIONS}
+        _store_content(course_title, content)
+    else:
+        # Fill in whatever is still missing from demo content
+        logger.warning("Streaming generation incomplete (%s), filling from demo content", fallback_reason)
+        demo_content = generate_demo_content(course_title)
+        for name in invalid:
+            emit("section", {"name": name, "content": demo_content[name]})
+        content = {name: sections.get(name) or demo_content[name] for name in REQUIRED_SECTIONS}
+
+    record_fallback(fallback_reason)
+    emit("done", {"cached": False, "fallback": fallback_reason})
+    return content, fallback_reason
+
+
+def _generate_content(course_title):
+    """
+    Generate content and report why demo content was used, if it was.
+    Returns a (content, fallback_reason) tuple where fallback_reason is
+    None for a successful Gemini generation.
+    """
+    logger.debug("Generating content for course: %s", course_title)
     
-    except Exception as e:
-        logging.error(f"API error: {str(e)}")
-        logging.warning(f"API error occurred, falling back to demo mode: {str(e)}")
-        return generate_demo_content(course_title)
+    if not llm_backend:
+        logger.warning("Gemini client not available, using demo content")
+        return generate_demo_content(course_title), "no_client"
+
+    if GENERATION_MODE == 'sections':
+        with time_stage("upstream_sections"):
+            sections = _generate_sections(course_title, REQUIRED_SECTIONS)
+        return _merge_sections(course_title, sections)
+    
+    # Use Gemini API for content generation, failing fast while the upstream is unhealthy
+    try:
+        with time_stage("upstream_call"):
+            response = upstream_breaker.call(_hedged_generate, course_hedger, _course_request(course_title))
+    except CircuitOpenError:
+        logger.warning("Gemini circuit open, using demo content")
+        return generate_demo_content(course_title), "circuit_open"
+    except Exception as gemini_error:
+        logger.error("Gemini API error: %s", gemini_error)
+        logger.warning("Gemini failed, falling back to demo mode")
+        return generate_demo_content(course_title), "api_error"
+    
+    record_usage(response)
+    sections, problem = _parse_course_response(course_title, response)
+    return _repair_content(course_title, sections, problem)
+
+
+async def _generate_content_async(course_title):
+    """
+    Async counterpart of _generate_content using the SDK's async client,
+    so an event loop can hold many generations in flight at once
+    """
+    logger.debug("Generating content asynchronously for course: %s", course_title)
+    
+    if not llm_backend:
+        logger.warning("Gemini client not available, using demo content")
+        return generate_demo_content(course_title), "no_client"
+
+    if GENERATION_MODE == 'sections':
+        with time_stage("upstream_sections"):
+            results = await asyncio.gather(
+                *(generate_section_async(course_title, section) for section in REQUIRED_SECTIONS)
+            )
+        sections = {name: items for name, items in zip(REQUIRED_SECTIONS, results) if items is not None}
+        return _merge_sections(course_title, sections)
+    
+    try:
+        with time_stage("upstream_call"):
+            response = await upstream_breaker.call_async(
+                _hedged_generate_async, course_hedger, _course_request(course_title)
+            )
+    except CircuitOpenError:
+        logger.warning("Gemini circuit open, using demo content")
+        return generate_demo_content(course_title), "circuit_open"
+    except Exception as gemini_error:
+        logger.error("Gemini API error: %s", gemini_error)
+        logger.warning("Gemini failed, falling back to demo mode")
+        return generate_demo_content(course_title), "api_error"
+    
+    record_usage(response)
+    sections, problem = _parse_course_response(course_title, response)
+    if problem is None:
+        return sections, None
+    return await asyncio.to_thread(_repair_content, course_title, sections, problem)
+
+
+def _parse_course_response(course_title, response):
+    """
+    Parse a Gemini course response and validate it section by section.
+    Returns a (valid_sections, problem) tuple where problem is None when
+    every section is present and well formed. Sections that completed
+    before a truncation or syntax error are still recovered.
+    """
+    # Extract content from Gemini response
+    if hasattr(response, 'text') and response.text:
+        content_text = response.text
+    else:
+        logger.warning("Empty response from Gemini")
+        return {}, "empty_response"
+
+    try:
+        with time_stage("json_parse"):
+            content = json.loads(content_text)
+        problem = None
+    except json.JSONDecodeError as e:
+        logger.error("JSON decode error: %s", e)
+        content = {}
+        problem = "json_error"
+        parser = SectionStreamParser()
+        try:
+            content = dict(parser.feed(content_text))
+        except ValueError:
+            pass
+
+    with time_stage("validate"):
+        sections, invalid = validate_sections(content)
+    if invalid and problem is None:
+        logger.warning("Generated content has invalid sections: %s", ', '.join(invalid))
+        problem = "invalid_structure"
+    if problem is None:
+        logger.info("Successfully generated educational content for: %s", course_title)
+    return sections, problem
+
+
+def _merge_sections(course_title, sections):
+    """
+    Merge separately generated sections into a course in display order.
+    Sections that failed are filled from demo content.
+    """
+    missing = [name for name in REQUIRED_SECTIONS if name not in sections]
+    if not missing:
+        logger.info("Successfully generated educational content for: %s", course_title)
+        return {name: sections[name] for name in REQUIRED_SECTIONS}, None
+
+    problem = "circuit_open" if upstream_breaker.state != 'closed' else "api_error"
+    if not sections:
+        logger.warning("No sections generated (%s), falling back to demo mode", problem)
+        return generate_demo_content(course_title), problem
+
+    logger.warning("Could not generate sections (%s), using demo content for them", ', '.join(missing))
+    demo_content = generate_demo_content(course_title)
+    return {name: sections.get(name) or demo_content[name] for name in REQUIRED_SECTIONS}, problem
+
+
+def _repair_content(course_title, sections, problem):
+    """
+    Regenerate only the sections missing from a partially valid response
+    instead of discarding the whole paid generation. Anything that still
+    cannot be generated is filled from demo content.
+    """
+    if problem is None:
+        return sections, None
+
+    if not sections:
+        logger.warning("No usable sections (%s), falling back to demo mode", problem)
+        return generate_demo_content(course_title), problem
+
+    missing = [name for name in REQUIRED_SECTIONS if name not in sections]
+    logger.info("Repairing sections for %s: %s", course_title, ', '.join(missing))
+    sections.update(_generate_sections(course_title, missing))
+
+    demo_content = generate_demo_content(course_title)
+    still_missing = [name for name in REQUIRED_SECTIONS if name not in sections]
+    content = {name: sections.get(name) or demo_content[name] for name in REQUIRED_SECTIONS}
+    if still_missing:
+        logger.warning("Could not repair sections (%s), using demo content for them", ', '.join(still_missing))
+        return content, problem
+
+    logger.info("Successfully repaired educational content for: %s", course_title)
+    return content, None
 
 
 def generate_demo_content(course_title):
@@ -115,7 +716,8 @@ def generate_demo_content(course_title):
     Generate demo educational content when AI APIs are not available
     This shows the application structure while API key issues are resolved
     """
-    logging.info(f"Generated demo content for: {course_title}")
+    logger.info("Generated demo content for: %s", course_title)
+    start = time.perf_counter()
     
     # Create educationally sound demo content based on the course title
     demo_content = {
@@ -153,6 +755,7 @@ def generate_demo_content(course_title):
         ]
     }
     
+    STAGE_SECONDS.observe("demo_fallback", value=time.perf_counter() - start)
     return demo_content
 
 
@@ -160,17 +763,5 @@ def validate_content_structure(content):
     """
     Validate that the generated content has the expected structure
     """
-    required_keys = ['course_objectives', 'syllabus', 'learning_outcomes', 'assessment_methods', 'recommended_readings']
-    
-    if not isinstance(content, dict):
-        return False
-        
-    for key in required_keys:
-        if key not in content:
-            return False
-        if not isinstance(content[key], list):
-            return False
-        if len(content[key]) == 0:
-            return False
-    
-    return True
\ No newline at end of file
+    _, invalid = validate_sections(content)
+    return not invalid
@@ -0,0 +1,175 @@
+"""
+Offline cache pre-warming for a known course catalog.
+
+Run before peak periods so catalog requests are served from the content
+cache instead of waiting on Gemini:
+
+    JOB_WORKERS=0 flask --app main prewarm catalog.txt --concurrency 4 --rate 2
+
+The titles file has one course title per line; blank lines and lines
+starting with # are ignored. Titles already cached are skipped. Every
+finished title is appended to a checkpoint file, so an interrupted run
+picks up where it stopped; titles that fell back to demo content are
+retried on the next run.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from content_cache import content_cache, normalize_title
+from openai_service import get_educational_content_with_fallback
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls to acquire() at least 1 / rate seconds apart across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def read_titles(path):
+    """Unique course titles from a catalog file, in file order"""
+    titles = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            course_title = line.strip()
+            if course_title and not course_title.startswith("#"):
+                titles.setdefault(normalize_title(course_title), course_title)
+    return list(titles.values())
+
+
+def load_checkpoint(path):
+    """Normalized titles recorded as done by an earlier run"""
+    done = set()
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write leaves a partial last line
+                continue
+            if entry.get("status") in ("generated", "cached"):
+                done.add(entry["key"])
+    return done
+
+
+class Prewarmer:
+    """
+    Generate content for every title not already cached, with at most
+    `concurrency` generations in flight and at most `rate` started per
+    second. Stops early after `max_failures` consecutive failures, which
+    usually means the upstream is down.
+    """
+
+    def __init__(self, concurrency=4, rate=1.0, checkpoint_path=None, max_failures=20, report=None):
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(rate)
+        self.checkpoint_path = checkpoint_path
+        self.max_failures = max_failures
+        self.report = report or (lambda line: None)
+        self.counts = {"generated": 0, "cached": 0, "failed": 0, "checkpointed": 0}
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._aborted = threading.Event()
+        self._checkpoint = None
+
+    def run(self, titles):
+        done = load_checkpoint(self.checkpoint_path)
+        pending = [title for title in titles if normalize_title(title) not in done]
+        self.counts["checkpointed"] = len(titles) - len(pending)
+        self.total = len(pending)
+        self.finished = 0
+        self.started_at = time.monotonic()
+        if self.counts["checkpointed"]:
+            self.report(f"Resuming: {self.counts['checkpointed']} titles already done")
+
+        if self.checkpoint_path:
+            directory = os.path.dirname(self.checkpoint_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        try:
+            remaining = iter(pending)
+            threads = [
+                threading.Thread(target=self._worker, args=(remaining,), name=f"prewarm-{i}", daemon=True)
+                for i in range(min(self.concurrency, len(pending)))
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            if self._checkpoint is not None:
+                self._checkpoint.close()
+
+        if self._aborted.is_set():
+            self.report(f"Stopped after {self.max_failures} consecutive failures")
+        return dict(self.counts, aborted=self._aborted.is_set())
+
+    def _worker(self, remaining):
+        while not self._aborted.is_set():
+            with self._lock:
+                course_title = next(remaining, None)
+            if course_title is None:
+                return
+            self._record(course_title, *self._prewarm(course_title))
+
+    def _prewarm(self, course_title):
+        if content_cache.get(course_title, count_miss=False) is not None:
+            return "cached", None, 0.0
+
+        self.rate_limiter.acquire()
+        start = time.monotonic()
+        try:
+            # Pre-warming exists to generate each title, not borrow a near duplicate's content
+            _, fallback_reason = get_educational_content_with_fallback(course_title, match_similar=False)
+        except Exception as e:
+            logger.error("Pre-warm generation error for %s: %s", course_title, e)
+            return "failed", str(e), time.monotonic() - start
+        if fallback_reason is not None:
+            return "failed", fallback_reason, time.monotonic() - start
+        return "generated", None, time.monotonic() - start
+
+    def _record(self, course_title, status, error, elapsed):
+        with self._lock:
+            self.counts[status] += 1
+            self.finished += 1
+            if status == "failed":
+                self._consecutive_failures += 1
+                if self.max_failures and self._consecutive_failures >= self.max_failures:
+                    self._aborted.set()
+            else:
+                self._consecutive_failures = 0
+
+            if self._checkpoint is not None:
+                entry = {"key": normalize_title(course_title), "course_title": course_title, "status": status}
+                if error:
+                    entry["error"] = error
+                self._checkpoint.write(json.dumps(entry) + "\n")
+                self._checkpoint.flush()
+
+            rate = self.finished / max(time.monotonic() - self.started_at, 1e-6)
+            eta = (self.total - self.finished) / rate if rate else 0
+            detail = f" ({error})" if error else ""
+            self.report(
+                f"[{self.finished}/{self.total}] {status:<9} {course_title}{detail}"
+                f" {elapsed:.1f}s, eta {eta:.0f}s"
+            )
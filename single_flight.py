@@ -0,0 +1,258 @@
+import asyncio
+import contextvars
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+# Directory for the lock files that coordinate gunicorn workers
+LOCK_DIR = os.environ.get("SINGLE_FLIGHT_LOCK_DIR", os.path.join("instance", "locks"))
+LOCK_TIMEOUT_SECONDS = float(os.environ.get("SINGLE_FLIGHT_LOCK_TIMEOUT", "120"))
+LOCK_POLL_SECONDS = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key so only one runs at a time.
+    Threads in the same worker wait on the leader's result; separate
+    workers are serialized through a per-key lock file, so a caller that
+    re-checks a shared store after acquiring it finds the leader's result.
+    """
+
+    def __init__(self, lock_dir=LOCK_DIR, lock_timeout=LOCK_TIMEOUT_SECONDS):
+        self.lock_dir = lock_dir
+        self.lock_timeout = lock_timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        if lock_dir and fcntl is not None:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the in-flight call with the same key
+        and return its result (or re-raise its exception)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._file_lock(key):
+                call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    @contextmanager
+    def _file_lock(self, key):
+        if not self.lock_dir or fcntl is None:
+            yield
+            return
+
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        path = os.path.join(self.lock_dir, f"{digest}.lock")
+        with open(path, "a") as lock_file:
+            acquired = False
+            deadline = time.monotonic() + self.lock_timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    acquired = True
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        logger.warning("Timed out waiting for generation lock: %s", key)
+                        break
+                    time.sleep(LOCK_POLL_SECONDS)
+            try:
+                yield
+            finally:
+                if acquired:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent coroutines that share a key within one event loop
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Await fn() for key, or wait for the in-flight call with the same
+        key and return its result (or re-raise its exception)
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self):
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+class _SharedStream:
+    def __init__(self):
+        self.events = []
+        self.finished = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def emit(self, event, data):
+        with self.condition:
+            self.events.append((event, data))
+            self.condition.notify_all()
+
+    def close(self, error=None):
+        with self.condition:
+            self.error = error
+            self.finished = True
+            self.condition.notify_all()
+
+    def replay(self):
+        """Every event from the start of the stream, then new ones as they arrive"""
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.events) and not self.finished:
+                    self.condition.wait()
+                events = self.events[position:]
+                position = len(self.events)
+                finished = self.finished and position == len(self.events)
+            yield from events
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class StreamFlight:
+    """
+    Share one producer between concurrent streams with the same key. The
+    producer runs on its own thread and publishes (event, data) pairs;
+    each subscriber replays the events so far and then follows new ones,
+    so late subscribers and subscribers that disconnect don't affect the
+    others, and the generation finishes even if every client leaves.
+    """
+
+    def __init__(self):
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def subscribe(self, key, produce):
+        """
+        Iterate the events of the stream for key, starting produce(emit) on
+        a new thread if no stream for key is in flight
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                self.coalesced += 1
+            else:
+                stream = self._streams[key] = _SharedStream()
+                self.leaders += 1
+                # Keep the request ID and other context on the producer's log records
+                context = contextvars.copy_context()
+                threading.Thread(
+                    target=context.run, args=(self._produce, key, stream, produce),
+                    name="stream-producer", daemon=True,
+                ).start()
+        return stream.replay()
+
+    def _produce(self, key, stream, produce):
+        error = None
+        try:
+            produce(stream.emit)
+        except Exception as e:
+            logger.error("Stream producer error for %s: %s", key, e)
+            error = e
+        finally:
+            with self._lock:
+                del self._streams[key]
+            stream.close(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._streams),
+            }
+
+
+generation_flight = SingleFlight()
+async_generation_flight = AsyncSingleFlight()
+stream_flight = StreamFlight()
@@ -0,0 +1,152 @@
+// Progressive rendering of generated content via the streaming API
+
+document.addEventListener('DOMContentLoaded', function() {
+    setupStreamingGeneration();
+});
+
+const SECTION_ORDER = [
+    'course_objectives',
+    'learning_outcomes',
+    'syllabus',
+    'assessment_methods',
+    'recommended_readings'
+];
+
+const SECTION_TITLES = {
+    course_objectives: 'Course Objectives',
+    learning_outcomes: 'Learning Outcomes',
+    syllabus: 'Sample Syllabus',
+    assessment_methods: 'Assessment Methods',
+    recommended_readings: 'Recommended Readings'
+};
+
+function setupStreamingGeneration() {
+    const courseForm = document.getElementById('courseForm');
+    const courseTitleInput = document.getElementById('course_title');
+
+    if (!courseForm || !courseTitleInput || !courseForm.dataset.streamUrl || !window.EventSource) {
+        return;
+    }
+
+    courseForm.addEventListener('submit', function(e) {
+        const courseTitle = courseTitleInput.value.trim();
+        if (courseTitle.length < 3 || courseTitle.length > 200) {
+            return;
+        }
+
+        e.preventDefault();
+        streamCourseContent(courseForm, courseTitle);
+    });
+}
+
+function streamCourseContent(courseForm, courseTitle) {
+    const output = createResultsSection(courseTitle);
+    const url = courseForm.dataset.streamUrl + '?course_title=' + encodeURIComponent(courseTitle);
+    const source = new EventSource(url);
+    let receivedSection = false;
+
+    source.addEventListener('section', function(e) {
+        const data = JSON.parse(e.data);
+        const container = output.querySelector('[data-section="' + data.name + '"]');
+        if (container) {
+            container.innerHTML = renderSection(data.name, data.content);
+            receivedSection = true;
+        }
+    });
+
+    source.addEventListener('done', function() {
+        source.close();
+        finishLoadingState();
+    });
+
+    source.addEventListener('error', function() {
+        source.close();
+        if (receivedSection) {
+            finishLoadingState();
+        } else {
+            // Fall back to the regular form submission
+            courseForm.submit();
+        }
+    });
+}
+
+function createResultsSection(courseTitle) {
+    const existing = document.getElementById('resultsSection');
+    if (existing) {
+        existing.remove();
+    }
+
+    const section = document.createElement('div');
+    section.id = 'resultsSection';
+
+    const downloadUrl = '/download/' + encodeURIComponent(courseTitle);
+    section.innerHTML =
+        '<div class="output-header">' +
+            '<span>Output:</span>' +
+            '<div>' +
+                '<button class="copy-btn" onclick="copyToClipboard()">Copy</button>' +
+                '<a href="' + downloadUrl + '" class="copy-btn" style="text-decoration: none; margin-left: 10px;">Download</a>' +
+            '</div>' +
+        '</div>' +
+        '<div class="output-content" id="outputContent"></div>';
+
+    const output = section.querySelector('#outputContent');
+    SECTION_ORDER.forEach(name => {
+        const placeholder = document.createElement('div');
+        placeholder.setAttribute('data-section', name);
+        output.appendChild(placeholder);
+    });
+
+    const privacyNotice = document.querySelector('.privacy-notice');
+    privacyNotice.parentNode.insertBefore(section, privacyNotice);
+    return output;
+}
+
+function renderSection(name, items) {
+    let html = '<strong>' + SECTION_TITLES[name] + ':</strong><br>';
+
+    items.forEach(item => {
+        switch (name) {
+            case 'course_objectives':
+                html += '• ' + escapeHtml(item.objective) + ' (' + escapeHtml(item.bloom_level) + ')<br>';
+                break;
+            case 'learning_outcomes':
+                html += '• ' + escapeHtml(item.outcome) + ' (' + escapeHtml(item.bloom_level) + ')<br>';
+                break;
+            case 'syllabus':
+                html += '• ' + escapeHtml(item.week) + ': ' + escapeHtml(item.topic) + '<br>';
+                html += '  - ' + escapeHtml(item.description) + '<br>';
+                break;
+            case 'assessment_methods':
+                html += '• ' + escapeHtml(item.method) + ' (' + escapeHtml(item.weight) + ')<br>';
+                html += '  - ' + escapeHtml(item.description) + '<br>';
+                break;
+            case 'recommended_readings':
+                html += '• ' + escapeHtml(item.title) + ' by ' + escapeHtml(item.author) + '<br>';
+                html += '  - Type: ' + escapeHtml(item.type) + '<br>';
+                html += '  - ' + escapeHtml(item.description) + '<br>';
+                break;
+        }
+    });
+
+    return html + '<br>';
+}
+
+function finishLoadingState() {
+    const loadingMessage = document.getElementById('loadingMessage');
+    const generateBtn = document.getElementById('generateBtn');
+
+    if (loadingMessage) {
+        loadingMessage.style.display = 'none';
+    }
+    if (generateBtn) {
+        generateBtn.disabled = false;
+        generateBtn.innerHTML = 'Generate Content';
+    }
+}
+
+function escapeHtml(value) {
+    const div = document.createElement('div');
+    div.textContent = value == null ? '' : String(value);
+    return div.innerHTML;
+}
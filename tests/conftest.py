@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Tests run against the stub backend and in-memory caches only
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("CONTENT_CACHE_PATH", "")
+os.environ.setdefault("SINGLE_FLIGHT_LOCK_DIR", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
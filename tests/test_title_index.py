@@ -0,0 +1,40 @@
+import pytest
+
+from title_index import TitleIndex, similarity_key
+
+
+def index_of(*titles):
+    index = TitleIndex(cache=None)
+    for course_title in titles:
+        index.add(course_title)
+    return index
+
+
+@pytest.mark.parametrize("generated, requested", [
+    ("Intro to Machine Learning", "Introduction to Machine Learning"),
+    ("Introduction to Machine Learning", "intro to ML"),
+    ("Advanced Organic Chemistry II", "Adv. Organic Chemistry II"),
+    ("Data Structures and Algorithms", "Data Structures & Algorithms"),
+])
+def test_near_duplicates_match(generated, requested):
+    assert index_of(generated).find(requested) is not None
+
+
+@pytest.mark.parametrize("generated, requested", [
+    ("Advanced Organic Chemistry II", "Advanced Organic Chemistry III"),
+    ("Intro to Python", "Intro to Python 2"),
+    ("Software Engineering", "Software Engineering I"),
+    ("Physics for Engineers", "Physics for Engineers II"),
+    ("Calculus 1", "Calculus 2"),
+    ("Intro to C", "Intro to C++"),
+    ("Intro to C", "Introduction to C#"),
+    ("Intro to C++", "Introduction to C#"),
+    ("Intro to C", "Intro to R"),
+])
+def test_different_courses_do_not_match(generated, requested):
+    assert index_of(generated).find(requested) is None
+
+
+def test_plus_and_hash_are_kept_in_keys():
+    keys = {similarity_key(title) for title in ("Intro to C", "Intro to C++", "Introduction to C#")}
+    assert len(keys) == 3
@@ -0,0 +1,230 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+
+from content_cache import content_cache, normalize_title
+
+logger = logging.getLogger(__name__)
+
+# Configure near-duplicate title matching from the environment
+# "offer" only suggests a near-duplicate's content, "serve" reuses it, "off" disables matching
+TITLE_MATCH_MODE = os.environ.get("TITLE_MATCH_MODE", "offer").lower()
+TITLE_SIMILARITY_THRESHOLD = float(os.environ.get("TITLE_SIMILARITY_THRESHOLD", "0.85"))
+TITLE_INDEX_REFRESH_SECONDS = float(os.environ.get("TITLE_INDEX_REFRESH", "30"))
+
+# MinHash signature of NUM_BANDS * ROWS_PER_BAND values. Titles share an LSH
+# bucket when any band matches, which happens with high probability above
+# roughly (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND) = 0.5 Jaccard similarity.
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+SHINGLE_SIZE = 3
+# Candidates verified per lookup, most band collisions first
+MAX_CANDIDATES = 32
+
+SIGNATURE_SIZE = NUM_BANDS * ROWS_PER_BAND
+
+# The index lives in process memory, so Python's per-process string hash
+# is a fine shingle hash
+_HASH_MASK = (1 << 64) - 1
+# Offset separating a borrowed bin value from the bin it was copied from
+_DENSIFY_OFFSET = 1 << 60
+
+# Common course title abbreviations, expanded before comparison
+ABBREVIATIONS = {
+    'intro': 'introduction',
+    'ml': 'machine learning',
+    'ai': 'artificial intelligence',
+    'cs': 'computer science',
+    'nlp': 'natural language processing',
+    'db': 'databases',
+    'os': 'operating systems',
+    'adv': 'advanced',
+    'prog': 'programming',
+    'eng': 'engineering',
+    'econ': 'economics',
+    'psych': 'psychology',
+    'stats': 'statistics',
+    'calc': 'calculus',
+    'chem': 'chemistry',
+    'bio': 'biology',
+}
+STOPWORDS = {'a', 'an', 'and', 'the', 'to', 'of', 'in', 'for', 'on', 'with'}
+
+# Tokens that name a different course when they differ, however similar the
+# rest of the title is: numbers and roman numerals ("Chemistry II", "Python
+# 3"), single letters ("Intro to C") and tokens with + or # ("C++", "C#")
+_ROMAN_NUMERAL = re.compile(r"^(?=[ivxl])(l?x{0,3})(ix|iv|v?i{0,3})$")
+
+TitleMatch = namedtuple('TitleMatch', ['course_title', 'similarity'])
+
+
+def similarity_key(course_title):
+    """
+    Reduce a title to the words that matter for similarity: punctuation
+    other than + and # and stopwords are dropped and abbreviations
+    expanded, so "Intro to ML" and "Introduction to Machine Learning"
+    compare equal
+    """
+    words = re.sub(r"[^\w+#]+", " ", normalize_title(course_title)).split()
+    expanded = []
+    for word in words:
+        if word in STOPWORDS:
+            continue
+        expanded.append(ABBREVIATIONS.get(word, word))
+    return " ".join(expanded)
+
+
+def distinguishing_tokens(key):
+    """
+    Tokens of a similarity key that must match exactly for two titles to
+    be the same course
+    """
+    return frozenset(
+        word for word in key.split()
+        if len(word) == 1 or word.isdigit() or "+" in word or "#" in word or _ROMAN_NUMERAL.match(word)
+    )
+
+
+def shingles(key):
+    """Hashed character n-grams of a similarity key"""
+    text = f" {key} "
+    return {
+        hash(text[i:i + SHINGLE_SIZE]) & _HASH_MASK
+        for i in range(max(1, len(text) - SHINGLE_SIZE + 1))
+    }
+
+
+def minhash(shingle_set):
+    """
+    One-permutation MinHash: each shingle hash lands in one of
+    SIGNATURE_SIZE bins and each bin keeps its minimum, which costs one
+    pass over the shingles instead of one per hash function. Empty bins
+    borrow the value of the next non-empty bin (rotation densification).
+    """
+    bins = [None] * SIGNATURE_SIZE
+    for value in shingle_set:
+        index, rest = value % SIGNATURE_SIZE, value // SIGNATURE_SIZE
+        if bins[index] is None or rest < bins[index]:
+            bins[index] = rest
+
+    signature = list(bins)
+    for index in range(SIGNATURE_SIZE):
+        if signature[index] is not None:
+            continue
+        for distance in range(1, SIGNATURE_SIZE):
+            borrowed = bins[(index + distance) % SIGNATURE_SIZE]
+            if borrowed is not None:
+                signature[index] = borrowed + distance * _DENSIFY_OFFSET
+                break
+    return signature
+
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def _band_hashes(signature):
+    # Bands take every NUM_BANDS-th bin rather than adjacent ones, so the
+    # rows of a band are rarely all borrowed from the same densified bin
+    return [hash((band, *signature[band::NUM_BANDS])) for band in range(NUM_BANDS)]
+
+
+class TitleIndex:
+    """
+    MinHash LSH index over the titles of generated courses. A lookup hashes
+    the query into NUM_BANDS buckets and checks only the titles sharing a
+    bucket, so its cost does not grow with the size of the library.
+    """
+
+    def __init__(self, cache=None, refresh_seconds=TITLE_INDEX_REFRESH_SECONDS):
+        self.cache = cache
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._titles = []
+        self._keys = {}
+        self._buckets = {}
+        self._loaded_until = 0.0
+        self._next_refresh = 0.0
+        self._refreshing = False
+
+    def add(self, course_title):
+        key = similarity_key(course_title)
+        if not key:
+            return
+        band_hashes = _band_hashes(minhash(shingles(key)))
+        with self._lock:
+            if key in self._keys:
+                return
+            title_id = self._keys[key] = len(self._titles)
+            self._titles.append((course_title, key, distinguishing_tokens(key)))
+            for band_hash in band_hashes:
+                self._buckets.setdefault(band_hash, []).append(title_id)
+
+    def matches(self, course_title, threshold=None, limit=5):
+        """
+        Indexed titles at or above the similarity threshold, most similar
+        first, as TitleMatch tuples
+        """
+        threshold = TITLE_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.refresh()
+        key = similarity_key(course_title)
+        if not key:
+            return []
+
+        query = shingles(key)
+        tokens = distinguishing_tokens(key)
+        collisions = Counter()
+        for band_hash in _band_hashes(minhash(query)):
+            collisions.update(self._buckets.get(band_hash, ()))
+
+        found = []
+        for title_id, _ in collisions.most_common(MAX_CANDIDATES):
+            title, candidate_key, candidate_tokens = self._titles[title_id]
+            if candidate_tokens != tokens:
+                continue
+            similarity = 1.0 if candidate_key == key else jaccard(query, shingles(candidate_key))
+            if similarity >= threshold:
+                found.append(TitleMatch(title, round(similarity, 3)))
+        found.sort(key=lambda match: -match.similarity)
+        return found[:limit]
+
+    def find(self, course_title, threshold=None):
+        """The most similar indexed title, or None"""
+        found = self.matches(course_title, threshold=threshold, limit=1)
+        return found[0] if found else None
+
+    def refresh(self):
+        """
+        Pick up titles stored in the persistent cache, including those
+        generated by other workers. Loading runs on a background thread at
+        most once every refresh_seconds, so lookups never wait for it.
+        """
+        if self.cache is None or time.monotonic() < self._next_refresh:
+            return
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._next_refresh:
+                return
+            self._refreshing = True
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+        threading.Thread(target=self._load_new_titles, name="title-index-refresh", daemon=True).start()
+
+    def _load_new_titles(self):
+        try:
+            for course_title, created_at in self.cache.titles_since(self._loaded_until):
+                self.add(course_title)
+                self._loaded_until = max(self._loaded_until, created_at)
+        except Exception as e:
+            logger.error("Title index refresh error: %s", e)
+        finally:
+            self._refreshing = False
+
+    def __len__(self):
+        return len(self._titles)
+
+
+title_index = TitleIndex(cache=content_cache)